@@ -0,0 +1,1157 @@
+"""Replay interaction traces against the real handlers in main.py.
+
+Discord is replaced by an in-process fake: interactions, channels, members
+and messages are plain objects whose REST calls sleep for a simulated
+latency and may answer with rate limits, which are retried the way
+discord.py retries them. Data files are written to a temporary directory.
+
+    python loadtest.py                          # synthetic trace
+    python loadtest.py --trace requests.jsonl   # replay a JSONL trace
+    python loadtest.py --levels 1 8 32 128 --events 2000 --rest-latency 0.08
+    python loadtest.py --profile-memory --guilds 2000  # default vs lean runtime
+    python loadtest.py --cold-start 100000             # JSON vs snapshot boot
+    python loadtest.py --stress 5000                   # concurrent mutation checks
+    python loadtest.py --archive 100000                # cold archive queries
+    python loadtest.py --bulk 120                      # resumable /bulklist runs
+    python loadtest.py --watch 100000 --burst 2000     # watchlist matching
+    python loadtest.py --search 20000                  # search index memory
+
+Trace lines are JSON objects with an "op" of list, update_price, offer,
+bin, sold, pricehistory or clean, plus optional "user", "guild", "ign",
+"bin_price", "co" and "notes". Lines without an "op" are replayed as a
+new listing whose IGN is derived from the line.
+
+--profile-memory skips the replay and instead feeds a synthetic guild
+fixture (GUILD_CREATE payloads followed by channel chatter) into the
+bot's gateway state once per runtime profile, each in a fresh process,
+and compares RSS and ingest time.
+
+--cold-start N writes N synthetic listings as JSON and as a binary
+snapshot, then times DataManager start-up from each. It also boots a
+50N-point price history log by full replay and from its rollup checkpoint
+plus a fresh tail, and checks both give the same rollups.
+
+--stress N fires N concurrent price updates, sales, posts and
+/cleanlistings scans at a small store through the real handlers, then
+checks that no scan crashed, no accepted update was lost, and the
+indexes still match the store. It exits non-zero if any check fails.
+
+--search N indexes N listings with ~300-character notes and reports the
+search index's memory and lookup times, then removes half of them and
+checks IGN prefixes and note searches against a linear scan. It exits
+non-zero if any lookup disagrees.
+
+--archive N closes N synthetic listings into the sold/expired archive
+over two simulated years, then compares a seller lookup that uses the
+segment indexes against a scan of every segment. It exits non-zero if
+they disagree or the indexes do not survive a reload.
+
+--bulk N uploads an N-row CSV (with some invalid rows, and accounts
+repeated by IGN or by UUID under a new name) through /bulklist, re-running it with the same file until no rows are
+pending, then checks each valid account was posted and stored exactly
+once. Per-run and quota limits apply; per-channel send pacing is lifted.
+
+--watch N registers N random watchlist subscriptions, matches a burst of
+listings against the range index and a linear scan of a sample, then
+queues the alerts, sells half the burst, and dispatches the batched DMs.
+It exits non-zero if the index and the scan disagree or a DM announces a
+listing that closed before the flush.
+"""
+import os
+import gc
+import sys
+import io
+import csv
+import json
+import random
+import math
+import re
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import itertools
+import time
+import zlib
+import tracemalloc
+from types import SimpleNamespace
+from typing import Optional, Dict, List, Any
+
+OPS = ("list", "update_price", "offer", "bin", "sold", "pricehistory", "clean")
+SYNTHETIC_WEIGHTS = {"list": 40, "update_price": 20, "offer": 15, "bin": 10, "sold": 8, "pricehistory": 6, "clean": 1}
+
+# =================== FAKE DISCORD TRANSPORT ===================
+class FakeRest:
+    """Simulated REST layer: per-call latency plus per-route rate limits"""
+    def __init__(self, latency: float, jitter: float, route_burst: int, route_window: float, error_rate: float):
+        self.latency = latency
+        self.jitter = jitter
+        self.route_burst = route_burst
+        self.route_window = route_window
+        self.error_rate = error_rate
+        self.routes: Dict[str, List[float]] = {}
+        self.calls = 0
+        self.rate_limited = 0
+
+    def retry_after(self, route: str) -> float:
+        if self.error_rate and random.random() < self.error_rate:
+            return 0.5
+        if not self.route_burst:
+            return 0.0
+        now = time.monotonic()
+        window = [t for t in self.routes.get(route, []) if now - t < self.route_window]
+        if len(window) >= self.route_burst:
+            self.routes[route] = window
+            return self.route_window - (now - window[0])
+        window.append(now)
+        self.routes[route] = window
+        return 0.0
+
+    async def request(self, route: str):
+        while True:
+            self.calls += 1
+            delay = max(0.0, random.gauss(self.latency, self.latency * self.jitter)) if self.latency else 0.0
+            await asyncio.sleep(delay)
+            retry = self.retry_after(route)
+            if not retry:
+                return
+            # discord.py sleeps for retry_after and retries the request transparently
+            self.rate_limited += 1
+            await asyncio.sleep(retry)
+
+class FakeUser:
+    def __init__(self, rest: FakeRest, user_id: int):
+        self.rest = rest
+        self.id = user_id
+        self.name = self.display_name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+        self.display_avatar = SimpleNamespace(url=f"https://cdn.example/avatars/{user_id}.png")
+        self.dms: List[Any] = []
+        self.guild_permissions = SimpleNamespace(administrator=True, manage_guild=True)
+
+    async def send(self, *args, **kwargs):
+        await self.rest.request(f"dm:{self.id}")
+        self.dms.append(kwargs.get("embed"))
+
+class FakeMessage:
+    def __init__(self, rest: FakeRest, message_id: int, channel, embed=None, view=None):
+        self.rest = rest
+        self.id = message_id
+        self.channel = channel
+        self.embeds = [embed] if embed else []
+        self.view = view
+        # Extra delay for the next edit only
+        self.lag = 0.0
+
+    async def edit(self, **kwargs):
+        lag, self.lag = self.lag, 0.0
+        await self.rest.request(f"channel:{self.channel.id}")
+        await asyncio.sleep(lag)
+        if kwargs.get("embed"):
+            self.embeds = [kwargs["embed"]]
+
+    async def delete(self):
+        await self.rest.request(f"channel:{self.channel.id}")
+        self.channel.messages.pop(self.id, None)
+
+class FakeChannel:
+    def __init__(self, rest: FakeRest, channel_id: int, guild):
+        self.rest = rest
+        self.id = channel_id
+        self.guild = guild
+        self.messages: Dict[int, FakeMessage] = {}
+
+    async def send(self, content=None, **kwargs):
+        await self.rest.request(f"channel:{self.id}")
+        message = FakeMessage(self.rest, next(FakeDiscord.snowflakes), self, kwargs.get("embed"), kwargs.get("view"))
+        self.messages[message.id] = message
+        return message
+
+    def get_partial_message(self, message_id: int) -> FakeMessage:
+        return self.messages.get(message_id) or FakeMessage(self.rest, message_id, self)
+
+    async def fetch_message(self, message_id: int):
+        await self.rest.request(f"channel:{self.id}")
+        if message_id not in self.messages:
+            raise LookupError(message_id)
+        return self.messages[message_id]
+
+class FakeGuild:
+    def __init__(self, discord_fake, guild_id: int):
+        self.discord = discord_fake
+        self.id = guild_id
+
+    def get_member(self, user_id: int):
+        return self.discord.user(user_id)
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+        self.kind = None
+        self.content = None
+        self.view = None
+        self.kwargs = {}
+        self.edited = False
+        self.expired = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def _ack(self, kind: str, content=None):
+        if self.done:
+            raise RuntimeError("interaction already acknowledged")
+        if self.expired:
+            raise RuntimeError("404 Not Found (error code: 10062): Unknown interaction")
+        self.done = True
+        await self.interaction.rest.request(f"interaction:{self.interaction.id}")
+        self.kind = kind
+        self.content = content
+        self.interaction.acked_at = time.perf_counter()
+
+    async def send_message(self, content=None, **kwargs):
+        await self._ack("message", content)
+        self.view = kwargs.get("view")
+
+    async def send_modal(self, modal):
+        await self._ack("modal")
+        self.interaction.modal = modal
+
+    async def defer(self, **kwargs):
+        await self._ack("defer")
+
+    async def edit_message(self, **kwargs):
+        await self._ack("edit")
+        self.edited = True
+        if self.interaction.message is not None:
+            await self.interaction.message.edit(**kwargs)
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        await self.interaction.rest.request(f"webhook:{self.interaction.id}")
+        self.interaction.response.content = content
+        self.interaction.response.kwargs = kwargs
+
+class FakeInteraction:
+    def __init__(self, discord_fake, user_id: int, guild_id: int, channel_id: int, message: Optional[FakeMessage] = None):
+        self.rest = discord_fake.rest
+        self.id = next(FakeDiscord.snowflakes)
+        self.client = discord_fake
+        self.user = discord_fake.user(user_id)
+        self.guild = discord_fake.guild(guild_id)
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.message = message
+        self.data = {}
+        self.modal = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.created_at = time.perf_counter()
+        self.acked_at = None
+        discord_fake.interactions.append(self)
+
+    async def edit_original_response(self, **kwargs):
+        """Edit after a deferred message update (a component's message, as in discord.py)"""
+        await self.rest.request(f"webhook:{self.id}")
+        self.response.edited = True
+        if self.message is not None:
+            await self.message.edit(**kwargs)
+
+class FakeDiscord:
+    """Stands in for the bot's gateway cache (get_channel) and REST client"""
+    snowflakes = itertools.count(1_500_000_000_000_000_000)
+
+    def __init__(self, rest: FakeRest):
+        self.rest = rest
+        self.users: Dict[int, FakeUser] = {}
+        self.guilds: Dict[int, FakeGuild] = {}
+        self.channels: Dict[int, FakeChannel] = {}
+        self.interactions: List[FakeInteraction] = []
+
+    def user(self, user_id: int) -> FakeUser:
+        if user_id not in self.users:
+            self.users[user_id] = FakeUser(self.rest, user_id)
+        return self.users[user_id]
+
+    def guild(self, guild_id: int) -> FakeGuild:
+        if guild_id not in self.guilds:
+            self.guilds[guild_id] = FakeGuild(self, guild_id)
+            channel_id = guild_id + 1
+            self.channels[channel_id] = FakeChannel(self.rest, channel_id, self.guilds[guild_id])
+        return self.guilds[guild_id]
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channels.get(channel_id)
+
+    def get_user(self, user_id: int) -> Optional[FakeUser]:
+        return self.users.get(user_id)
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        await self.rest.request(f"user:{user_id}")
+        return self.user(user_id)
+
+    def interaction(self, user_id: int, guild_id: int, message: Optional[FakeMessage] = None) -> FakeInteraction:
+        self.guild(guild_id)
+        return FakeInteraction(self, user_id, guild_id, guild_id + 1, message)
+
+# =================== TRACES ===================
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    events = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            if event.get("op") not in OPS:
+                seed = zlib.crc32(line.encode())
+                event = {"op": "list", "user": 1000 + seed % 500, "guild": 10_000 + seed % 20 * 10,
+                         "ign": f"Acct{seed % 100000}", "bin_price": f"${50 + seed % 400}"}
+            events.append(event)
+    return events
+
+def synthetic_trace(count: int, users: int, guilds: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    ops, weights = zip(*SYNTHETIC_WEIGHTS.items())
+    return [{
+        "op": rng.choices(ops, weights)[0],
+        "user": 1000 + rng.randrange(users),
+        "guild": 10_000 + rng.randrange(guilds) * 10,
+        "ign": f"Acct{rng.randrange(count * 4)}",
+        "bin_price": f"${rng.randint(20, 500)}",
+        "co": f"${rng.randint(10, 300)}",
+    } for _ in range(count)]
+
+# =================== REPLAY ===================
+class Replayer:
+    def __init__(self, main, discord_fake: FakeDiscord):
+        self.main = main
+        self.discord = discord_fake
+        self.rejected = 0
+        self.failed = 0
+
+    def pick_listing(self, event: Dict[str, Any], own: bool) -> Optional[Dict]:
+        user = event.get("user", 1000)
+        listings = self.main.data_manager.listings
+        for listing in itertools.islice(listings.values(), 0, 200):
+            if (listing.get("seller_id") == user) == own:
+                return listing
+        return None
+
+    def message_for(self, listing: Dict) -> FakeMessage:
+        channel = self.discord.get_channel(listing["channel_id"])
+        message = channel.messages.get(listing["message_id"])
+        if message is None:
+            message = channel.messages[listing["message_id"]] = FakeMessage(
+                self.discord.rest, listing["message_id"], channel, self.main.discord.Embed(title=listing["ign"]))
+        return message
+
+    def note(self, interaction: FakeInteraction):
+        if interaction.response.content and str(interaction.response.content).startswith("⏳"):
+            self.rejected += 1
+
+    async def run(self, event: Dict[str, Any]):
+        try:
+            await getattr(self, f"op_{event['op']}")(event)
+        except Exception as e:
+            self.failed += 1
+            if self.failed <= 5:
+                print(f"   {event['op']} failed: {e!r}")
+
+    async def op_list(self, event):
+        main, user, guild = self.main, event.get("user", 1000), event.get("guild", 10_000)
+        interaction = self.discord.interaction(user, guild)
+        await main.create_listing.callback(interaction)
+        self.note(interaction)
+        if interaction.modal is not None:
+            modal = interaction.modal
+            modal.ign._value = event.get("ign", f"Acct{user}")
+            modal.bin_price._value = event.get("bin_price", "")
+            modal.co._value = event.get("co", "")
+            modal.notes._value = event.get("notes", "")
+            await modal.on_submit(self.discord.interaction(user, guild))
+
+        stat_view = main.StatSelectionView(main.draft_store.key_for(user, guild))
+        interaction = self.discord.interaction(user, guild)
+        await stat_view.set_bedwars.callback(interaction)
+        if interaction.modal is not None:
+            modal = interaction.modal
+            modal.view = stat_view
+            modal.level._value = str(event.get("level", random.randint(1, 1500)))
+            await modal.on_submit(self.discord.interaction(user, guild))
+
+        interaction = self.discord.interaction(user, guild)
+        await stat_view.preview_listing.callback(interaction)
+        confirm_view = interaction.response.view
+        if isinstance(confirm_view, main.ListingConfirmView):
+            interaction = self.discord.interaction(user, guild)
+            await confirm_view.post_listing.callback(interaction)
+            self.note(interaction)
+
+    async def op_update_price(self, event):
+        listing = self.pick_listing(event, own=True) or self.pick_listing(event, own=False)
+        if listing is None:
+            return await self.op_list(event)
+        interaction = self.discord.interaction(listing["seller_id"], listing["guild_id"], self.message_for(listing))
+        view = self.main.ListingManageView(listing)
+        await view.update_price.callback(interaction)
+        if interaction.modal is not None:
+            modal = interaction.modal
+            modal.bin_price._value = event.get("bin_price", "")
+            modal.co._value = event.get("co", "")
+            await modal.on_submit(self.discord.interaction(listing["seller_id"], listing["guild_id"], self.message_for(listing)))
+
+    async def op_offer(self, event):
+        listing = self.pick_listing(event, own=False)
+        if listing is None:
+            return
+        buyer = self.discord.user(event.get("user", 1000))
+        view = self.main.OfferConfirmView(listing, buyer, event.get("co", "$10"))
+        interaction = self.discord.interaction(buyer.id, listing["guild_id"])
+        await view.send_offer.callback(interaction)
+        self.note(interaction)
+
+    async def op_bin(self, event):
+        listing = self.pick_listing(event, own=False)
+        if listing is None or not listing.get("bin_price"):
+            return
+        buyer = self.discord.user(event.get("user", 1000))
+        view = self.main.BINConfirmView(listing, buyer)
+        interaction = self.discord.interaction(buyer.id, listing["guild_id"])
+        await view.confirm_purchase.callback(interaction)
+        self.note(interaction)
+
+    async def op_sold(self, event):
+        listing = self.pick_listing(event, own=True) or self.pick_listing(event, own=False)
+        if listing is None:
+            return
+        interaction = self.discord.interaction(listing["seller_id"], listing["guild_id"], self.message_for(listing))
+        await self.main.ListingManageView(listing).mark_sold.callback(interaction)
+
+    async def op_pricehistory(self, event):
+        interaction = self.discord.interaction(event.get("user", 1000), event.get("guild", 10_000))
+        await self.main.price_history_command.callback(interaction, event.get("ign", "Acct0"))
+
+    async def op_clean(self, event):
+        interaction = self.discord.interaction(event.get("user", 1000), event.get("guild", 10_000))
+        await self.main.clean_listings.callback(interaction)
+
+async def monitor_loop_lag(samples: List[float], interval: float = 0.01):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run_level(main, discord_fake: FakeDiscord, args, trace: List[Dict[str, Any]],
+                    concurrency: int, offset: int) -> Dict[str, Any]:
+    rest = discord_fake.rest
+    rest.calls = rest.rate_limited = 0
+    discord_fake.interactions = []
+    replayer = Replayer(main, discord_fake)
+    events = [trace[(offset + i) % len(trace)] for i in range(args.events)]
+    queue = iter(events)
+
+    async def worker():
+        for event in queue:
+            await replayer.run(event)
+
+    lag: List[float] = []
+    monitor = asyncio.create_task(monitor_loop_lag(lag))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    monitor.cancel()
+
+    acks = [i.acked_at - i.created_at for i in discord_fake.interactions if i.acked_at is not None]
+    return {
+        "concurrency": concurrency,
+        "ops_per_sec": len(events) / elapsed if elapsed else 0.0,
+        "ack_p50_ms": percentile(acks, 0.50) * 1000,
+        "ack_p99_ms": percentile(acks, 0.99) * 1000,
+        "late_acks": sum(1 for a in acks if a > 3.0),
+        "lag_p99_ms": percentile(lag, 0.99) * 1000,
+        "lag_max_ms": max(lag, default=0.0) * 1000,
+        "rest_calls": rest.calls,
+        "rate_limited": rest.rate_limited,
+        "rejected": replayer.rejected,
+        "failed": replayer.failed,
+        "listings": len(main.data_manager.listings),
+    }
+
+def print_report(rows: List[Dict[str, Any]]):
+    columns = ["concurrency", "ops_per_sec", "ack_p50_ms", "ack_p99_ms", "late_acks", "lag_p99_ms",
+               "lag_max_ms", "rest_calls", "rate_limited", "rejected", "failed", "listings"]
+    print(" ".join(f"{c:>12}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>12.1f}" if isinstance(row[c], float) else f"{row[c]:>12}" for c in columns))
+
+# =================== MEMORY PROFILE ===================
+def guild_payload(guild_id: int, channels: int, members: int) -> Dict[str, Any]:
+    return {
+        "id": str(guild_id),
+        "name": f"guild-{guild_id}",
+        "owner_id": "1",
+        "features": [],
+        "emojis": [],
+        "stickers": [],
+        "member_count": members,
+        "large": members > 250,
+        "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                   "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [{"id": str(guild_id + 1 + c), "type": 0, "name": f"channel-{c}", "position": c,
+                      "permission_overwrites": []} for c in range(channels)],
+        "members": [{"user": {"id": str(guild_id * 1000 + m), "username": f"member{m}", "discriminator": "0",
+                              "avatar": None}, "roles": [], "joined_at": "2024-01-01T00:00:00+00:00",
+                     "deaf": False, "mute": False, "flags": 0} for m in range(min(members, 250))],
+    }
+
+def message_payload(message_id: int, guild_id: int, channel_id: int) -> Dict[str, Any]:
+    return {
+        "id": str(message_id), "channel_id": str(channel_id), "guild_id": str(guild_id), "type": 0,
+        "content": "WTS account, dm me " * 5, "tts": False, "mention_everyone": False, "pinned": False,
+        "timestamp": "2024-01-01T00:00:00+00:00", "edited_timestamp": None, "attachments": [], "embeds": [],
+        "mentions": [], "mention_roles": [],
+        "author": {"id": str(guild_id * 1000 + 1), "username": "member1", "discriminator": "0", "avatar": None},
+    }
+
+def current_rss_kb() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+async def memory_fixture(main, lean: bool, guilds: int, channels: int, members: int, messages: int) -> Dict[str, Any]:
+    """Ingest a synthetic guild fixture into a fresh bot's gateway state"""
+    gc.collect()
+    baseline = current_rss_kb()
+    started = time.perf_counter()
+    client = main.AdvancedListingBot(lean=lean)
+    await client._async_setup_hook()
+    state = client._connection
+    chunk_needed = 0
+    for g in range(guilds):
+        guild = state._add_guild_from_data(guild_payload(10_000_000 + g * 1000, channels, members))
+        chunk_needed += state._guild_needs_chunking(guild)
+    ingest = time.perf_counter() - started
+
+    # The gateway only delivers MESSAGE_CREATE when the guild_messages intent is on
+    delivered = 0
+    if client.intents.guild_messages:
+        for m in range(messages):
+            g = m % guilds
+            guild_id = 10_000_000 + g * 1000
+            state.parse_message_create(message_payload(2_000_000_000 + m, guild_id, guild_id + 1))
+            delivered += 1
+            if m % 500 == 0:
+                # Let the dispatched on_message handlers run
+                await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    gc.collect()
+    return {
+        "profile": "lean" if lean else "default",
+        "intents": client.intents.value,
+        "ingest_ms": ingest * 1000,
+        "total_ms": (time.perf_counter() - started) * 1000,
+        "rss_delta_mb": (current_rss_kb() - baseline) / 1024,
+        "cached_members": sum(len(guild._members) for guild in client.guilds),
+        "cached_messages": len(state._messages or ()),
+        "messages_parsed": delivered,
+        "chunk_requests": chunk_needed,
+    }
+
+def profile_memory(args):
+    rows = []
+    for profile in ("default", "lean"):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--memory-fixture", profile,
+             "--guilds", str(args.guilds), "--fixture-channels", str(args.fixture_channels),
+             "--fixture-members", str(args.fixture_members), "--fixture-messages", str(args.fixture_messages)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        rows.append(json.loads(output.strip().splitlines()[-1]))
+    columns = list(rows[0])
+    print(" ".join(f"{c:>16}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>16.1f}" if isinstance(row[c], float) else f"{row[c]:>16}" for c in columns))
+    return rows
+
+# =================== COLD START ===================
+def synthetic_listings(count: int) -> Dict[str, Dict[str, Any]]:
+    rng = random.Random(count)
+    listings = {}
+    for i in range(count):
+        message_id = 1_414_000_000_000_000_000 + i
+        listings[str(message_id)] = {
+            "ign": f"Acct{i}",
+            "seller_id": 300_000_000_000_000_000 + rng.randrange(5000),
+            "bin_price": str(rng.randint(20, 900)),
+            "co": str(rng.randint(10, 600)),
+            "notes": rng.choice(["- Unbanned", "Full access, OG email", "No bans, 2 capes", None]),
+            "stats": {
+                "general": {"rank": rng.choice(["VIP", "MVP+", "MVP++"]), "network_level": rng.randint(1, 300)},
+                "bedwars": {"level": rng.randint(0, 2000), "fkdr": round(rng.random() * 10, 2), "wins": rng.randint(0, 9000)},
+                "skywars": {"level": rng.randint(0, 50), "kdr": round(rng.random() * 4, 2), "wins": rng.randint(0, 9000)},
+                "duels": {"title": rng.choice([None, "Iron", "Celestial"]), "wins": rng.randint(0, 20000), "kdr": 1.5},
+            },
+            "custom_colors": {"embed_color": 0, "bedwars_color": 15749156, "skywars_color": None, "duels_color": None},
+            "created_at": "2025-09-07T09:43:12.638083",
+            "message_id": message_id,
+            "channel_id": 1_414_016_255_194_828_983,
+            "guild_id": 1_413_686_445_255_692_310,
+        }
+    return listings
+
+def cold_start(main, count: int) -> List[Dict[str, Any]]:
+    listings = synthetic_listings(count)
+    main.LISTINGS_FILE = os.path.abspath("bench_listings.json")
+    main.LISTINGS_SNAPSHOT_FILE = os.path.abspath("bench_listings.snap")
+    raw = json.dumps(listings, indent=2).encode("utf-8")
+    with open(main.LISTINGS_FILE, 'wb') as f:
+        f.write(raw)
+    main.ListingSnapshot.write(main.LISTINGS_SNAPSHOT_FILE, listings, (len(raw), zlib.crc32(raw)))
+    with open(main.LISTINGS_FILE) as f:
+        original = f.read()
+    sample = str(1_414_000_000_000_000_000 + count // 2)
+    del listings
+    gc.collect()
+
+    rows = []
+    for source, snapshot in (("json", None), ("snapshot", main.LISTINGS_SNAPSHOT_FILE)):
+        main.LISTINGS_SNAPSHOT_FILE = snapshot
+        started = time.perf_counter()
+        manager = main.DataManager()
+        online = time.perf_counter() - started
+        manager.listings[sample]
+        first_access = time.perf_counter() - started - online
+        manager.ensure_indexed()
+        indexed = time.perf_counter() - started
+        exact = json.dumps(dict(manager.listings.items()), indent=2) == original
+        rows.append({
+            "source": source,
+            "file_mb": os.path.getsize(snapshot or main.LISTINGS_FILE) / 2**20,
+            "online_ms": online * 1000,
+            "first_get_ms": first_access * 1000,
+            "indexed_ms": indexed * 1000,
+            "round_trip": exact,
+        })
+        del manager
+        gc.collect()
+
+    columns = list(rows[0])
+    print(" ".join(f"{c:>14}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>14.1f}" if isinstance(row[c], float) else f"{str(row[c]):>14}" for c in columns))
+    price_history_start(main, count * 50)
+    return rows
+
+def price_history_start(main, points: int):
+    """Boot the price history from its whole raw log, then from the checkpoint plus a new tail"""
+    rng = random.Random(points)
+    path = os.path.abspath("bench_price_history.bin")
+    record = main.PriceHistoryStore.RECORD
+    now = time.time()
+
+    def append_points(count: int):
+        with open(path, 'ab') as f:
+            for _ in range(count):
+                ign = f"acct{rng.randrange(max(points // 500, 1))}".encode("utf-8")
+                f.write(record.pack(now - rng.random() * 120 * 86400, ign, rng.uniform(10, 500), math.nan))
+
+    append_points(points)
+    started = time.perf_counter()
+    full = main.PriceHistoryStore(path)
+    full_ms = (time.perf_counter() - started) * 1000
+    full.flush()
+
+    append_points(points // 100)
+    started = time.perf_counter()
+    resumed = main.PriceHistoryStore(path)
+    tail_ms = (time.perf_counter() - started) * 1000
+
+    os.remove(resumed.checkpoint_path)
+    replayed = main.PriceHistoryStore(path)
+    agree = (resumed.hourly, resumed.daily) == (replayed.hourly, replayed.daily)
+    print(f"price history ({points} points): full replay {full_ms:.0f} ms, "
+          f"checkpoint + 1% tail {tail_ms:.0f} ms, rollups agree: {agree}")
+    del full
+
+# =================== SEARCH ===================
+def search_benchmark(main, count: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = ["".join(rng.choice(alphabet) for _ in range(rng.randint(3, 9))) for _ in range(count * 2)]
+    listings = {
+        str(index): {
+            "ign": "".join(rng.choice(alphabet + "0123456789_") for _ in range(rng.randint(4, 16))),
+            "notes": " ".join(rng.choice(vocabulary) for _ in range(45)),
+        }
+        for index in range(count)
+    }
+
+    tracemalloc.start()
+    index = main.SearchIndex()
+    started = time.perf_counter()
+    for listing_id, listing in listings.items():
+        index.add(listing_id, listing)
+    built = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    for listing_id in list(listings)[::2]:
+        index.remove(listing_id, listings.pop(listing_id))
+
+    def scan(query: str) -> set:
+        words = re.findall(r"[a-z0-9]+", query)
+        found = {listing_id for listing_id, listing in listings.items() if listing["ign"].startswith(query)}
+        for listing_id, listing in listings.items():
+            tokens = index.tokenize(listing["notes"])[:index.MAX_NOTE_TOKENS]
+            if all(word in tokens for word in words[:-1]) and any(token.startswith(words[-1]) for token in tokens):
+                found.add(listing_id)
+        return found
+
+    queries = [rng.choice(alphabet) + rng.choice(alphabet) for _ in range(20)]
+    queries += [f"{rng.choice(vocabulary)} {rng.choice(alphabet)}" for _ in range(20)]
+    agree, timings = True, []
+    for query in queries:
+        started = time.perf_counter()
+        results = index.search(query, 25)
+        timings.append(time.perf_counter() - started)
+        expected = scan(query)
+        # Multi-word queries filter a bounded candidate list, so only single words must fill the limit
+        complete = " " in query or len(results) == min(25, len(expected))
+        agree = agree and complete and len(set(results)) == len(results) and set(results) <= expected
+
+    print(f"indexed {count} listings in {built:.1f}s: {memory / 2**20:.0f} MB "
+          f"({memory / count / 1024:.1f} KB per listing)")
+    print(f"search p50 {percentile(timings, 0.5) * 1000:.2f} ms, p99 {percentile(timings, 0.99) * 1000:.2f} ms "
+          f"after removing half the listings")
+    print(f"results agree with a linear scan: {agree}")
+    return agree
+
+# =================== ARCHIVE ===================
+def archive_benchmark(main, count: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    store = main.ListingArchive(os.path.abspath("bench_archive"))
+    listings = synthetic_listings(count)
+    started_at = time.time() - 730 * 86400
+    raw_bytes = 0
+
+    started = time.perf_counter()
+    for index, (listing_id, listing) in enumerate(listings.items()):
+        # Spread closes over two years so the archive has ~24 monthly segments; each
+        # append is what one sale does in production (durable on return, no flush)
+        listing["guild_id"] = 10_000 + rng.randrange(20)
+        record_time = started_at + index * 730 * 86400 / count
+        status = "sold" if rng.random() < 0.7 else "expired"
+        store.append(listing_id, listing, status, timestamp=record_time)
+        raw_bytes += len(json.dumps(listing)) + 1
+    archived = time.perf_counter() - started
+    segment_bytes = sum(index["bytes"] for index in store.indexes.values())
+    sealed_raw = sum(len(json.dumps(record)) + 1 for month in store.indexes if month not in store.staging
+                     for record in store.read_segment(month))
+
+    # A seller who only sold in a few months
+    seller_id = 42
+    for month_offset in (30, 200, 600):
+        store.append(f"rare-{month_offset}", {"ign": "RareSeller", "seller_id": seller_id, "guild_id": 10_000,
+                                              "bin_price": "75"}, "sold",
+                     timestamp=started_at + month_offset * 86400)
+    opened = [month for month, index in store.indexes.items() if str(seller_id) in index["sellers"]]
+
+    started = time.perf_counter()
+    sales = store.seller_sales(seller_id)
+    indexed_time = time.perf_counter() - started
+    started = time.perf_counter()
+    scanned = [record for month in store.indexes for record in store.read_segment(month)
+               if record["status"] == "sold" and record.get("seller_id") == seller_id]
+    full_time = time.perf_counter() - started
+    started = time.perf_counter()
+    monthly = store.guild_monthly(10_000, months=24)
+    monthly_time = time.perf_counter() - started
+
+    reloaded = main.ListingArchive(store.directory)
+    consistent = reloaded.indexes == store.indexes and len(sales) == len(scanned) == 3
+    compressed = segment_bytes / max(sealed_raw, 1) < 0.25
+
+    print(f"archived {count} listings one sale at a time in {archived * 1000:.0f} ms "
+          f"({archived / count * 1e6:.0f} us each): {len(store.indexes)} segments, {raw_bytes / 2**20:.1f} MB raw JSON")
+    print(f"sealed segments are {segment_bytes / max(sealed_raw, 1):.2f} of their raw size")
+    print(f"seller history: opened {len(opened)}/{len(store.indexes)} segments in {indexed_time * 1000:.1f} ms, "
+          f"full scan {full_time * 1000:.0f} ms")
+    print(f"guild monthly stats ({len(monthly)} months) from indexes in {monthly_time * 1000:.2f} ms")
+    print(f"indexes survive reload and agree with a full scan: {consistent}")
+    return consistent and compressed
+
+# =================== WATCHLISTS ===================
+def brute_force_matches(main, subscriptions: List[Dict[str, Any]], listing: Dict[str, Any]) -> set:
+    levels = main.WatchlistManager.listing_levels(listing)
+    price = main.parse_price(listing.get("bin_price"))
+    price = math.inf if price is None else price
+    matches = set()
+    for sub in subscriptions:
+        level = levels.get(sub["game"])
+        if sub["guild_id"] != listing["guild_id"] or level is None:
+            continue
+        low, high, max_price = main.WatchlistManager.bounds(sub)
+        if low <= level <= high and price <= max_price:
+            matches.add(sub["id"])
+    return matches
+
+async def watch_benchmark(main, count: int, burst: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    manager = main.WatchlistManager(os.path.abspath("bench_watchlists.json"))
+    guild_id = 1_413_686_445_255_692_310
+    titles = [title[0] for title in main.DUELS_TITLES]
+
+    started = time.perf_counter()
+    for i in range(count):
+        game = rng.choice(("bedwars", "bedwars", "skywars", "duels"))
+        if game == "duels":
+            low, high = rng.randrange(len(titles)), None
+        else:
+            top = 3000 if game == "bedwars" else 60
+            low = rng.randrange(top)
+            high = rng.choice([None, low + rng.randrange(top)])
+        max_price = rng.choice([None, float(rng.randint(20, 900))])
+        manager.subscribe(300_000_000_000_000_000 + i % 20_000, guild_id, game, low, high, max_price)
+    subscribed = time.perf_counter() - started
+    manager.flush()
+
+    listings = list(synthetic_listings(burst).items())
+    subscriptions = list(manager.subscriptions.values())
+
+    started = time.perf_counter()
+    indexed = [manager.match(listing) for _, listing in listings]
+    indexed_time = time.perf_counter() - started
+
+    sample = listings[:min(len(listings), 200)]
+    started = time.perf_counter()
+    brute = [brute_force_matches(main, subscriptions, listing) for _, listing in sample]
+    brute_time = (time.perf_counter() - started) * len(listings) / len(sample)
+    correct = all(indexed[i] == brute[i] for i in range(len(sample)))
+
+    main.data_manager.add_listings(dict(listings))
+    for listing_id, listing in listings:
+        manager.notify(listing_id, listing)
+    users = len(manager.pending)
+    queued = sum(len(matches) for matches in manager.pending.values())
+    # Half the burst sells before the alerts go out; those must not be announced
+    sold = {listing_id for listing_id, _ in listings[::2]}
+    for listing_id in sold:
+        main.data_manager.remove_listing(listing_id)
+    expected_dms = sum(1 for queued_ids in manager.pending.values() if set(queued_ids) - sold)
+    discord_fake = FakeDiscord(FakeRest(0.001, 0.5, 0, 1.0, 0.0))
+    started = time.perf_counter()
+    await manager.flush_alerts(discord_fake)
+    dispatched = time.perf_counter() - started
+    embeds = [embed for user in discord_fake.users.values() for embed in user.dms]
+    announced = {field.value.rsplit("/", 1)[-1].rstrip(")") for embed in embeds for field in embed.fields}
+    fresh = len(embeds) == expected_dms and not announced & sold
+
+    print(f"{count} subscriptions indexed in {subscribed * 1000:.0f} ms, file {os.path.getsize(manager.path) / 2**20:.1f} MB")
+    print(f"burst of {burst} listings: index {indexed_time * 1000:.1f} ms "
+          f"({indexed_time / burst * 1e6:.0f} us/listing), linear scan ~{brute_time * 1000:.0f} ms (extrapolated)")
+    print(f"{sum(map(len, indexed))} matches -> {queued} queued alerts for {users} users; "
+          f"{len(sold)} listings sold before the flush, {len(embeds)} DMs sent in {dispatched * 1000:.0f} ms")
+    print(f"index agrees with linear scan on {len(sample)} listings: {correct}")
+    print(f"DMs skip listings closed before the flush: {fresh}")
+    return correct and fresh
+
+# =================== BULK LISTING ===================
+class FakeAttachment:
+    def __init__(self, filename: str, data: bytes):
+        self.filename = filename
+        self.data = data
+        self.size = len(data)
+
+    async def read(self) -> bytes:
+        return self.data
+
+def bulk_account_uuid(index: int) -> str:
+    return f"{index + 1:032x}"
+
+def bulk_upload(count: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["ign", "uuid", "bin_price", "co", "notes", "rank", "network_level", "bedwars_level",
+                     "bedwars_fkdr", "skywars_level", "duels_title", "duels_wins", "embed_color"])
+    for i in range(count):
+        row = [f"Bulk{i}", bulk_account_uuid(i), f"${rng.randint(20, 900)}", "", "Full access", "MVP+",
+               rng.randint(1, 300), rng.randint(0, 2000), round(rng.random() * 10, 2), rng.randint(0, 50),
+               rng.choice(["", "Iron", "celestial"]), rng.randint(0, 9000), "#5865F2"]
+        if i % 25 == 7:
+            row[7] = "lots"  # invalid star level
+        if i % 40 == 11:
+            row[0:2] = [f"Bulk{i - 1}", bulk_account_uuid(i - 1)]  # same account twice in one file
+        if i % 60 == 23:
+            row[1] = bulk_account_uuid(i - 1)  # the previous account again, renamed since
+        writer.writerow(row)
+    return buffer.getvalue().encode("utf-8")
+
+async def bulk_benchmark(main, count: int, seed: int) -> bool:
+    # The simulated REST latency paces sends here; the per-channel budget would only add sleeps
+    main.CHANNEL_SENDS_PER_SECOND = 10**6
+    discord_fake = FakeDiscord(FakeRest(0.005, 0.5, 0, 1.0, 0.0))
+    guild_id, seller_id = 20_000, 2000
+    discord_fake.guild(guild_id)
+    upload = FakeAttachment("accounts.csv", bulk_upload(count, seed))
+
+    runs = []
+    while True:
+        interaction = discord_fake.interaction(seller_id, guild_id)
+        before = len(main.data_manager.listings)
+        started = time.perf_counter()
+        await main.bulk_list.callback(interaction, upload)
+        elapsed = time.perf_counter() - started
+        report = list(csv.DictReader(io.StringIO(interaction.response.kwargs["file"].fp.read().decode("utf-8"))))
+        statuses: Dict[str, int] = {}
+        for row in report:
+            statuses[row["status"]] = statuses.get(row["status"], 0) + 1
+        runs.append((elapsed, len(main.data_manager.listings) - before, statuses))
+        print(f"run {len(runs)}: {elapsed * 1000:.0f} ms, stored {runs[-1][1]}, " +
+              ", ".join(f"{status}={n}" for status, n in statuses.items()))
+        if not statuses.get("pending") or len(runs) > count:
+            break
+
+    stored = [listing for listing in main.data_manager.listings.values() if listing.get("seller_id") == seller_id]
+    channel = discord_fake.get_channel(guild_id + 1)
+    # Rows 40k+11 repeat account i-1 under its name, rows 60k+23 under a new one; the first valid row posts
+    expected = len({i - 1 if i % 40 == 11 or i % 60 == 23 else i for i in range(count) if i % 25 != 7})
+    checks = {
+        "every valid account posted once": len(stored) == len({l.get("uuid") for l in stored}) == expected,
+        "every post stored": len(channel.messages) == len(stored),
+        "runs respect the per-run cap": all(stored_now <= main.BULK_MAX_POSTS for _, stored_now, _ in runs),
+        "reservations released": not main.data_manager.ign_index.pending,
+    }
+    for name, passed in checks.items():
+        print(f"   {'PASS' if passed else 'FAIL'}  {name}")
+    return all(checks.values())
+
+# =================== STRESS ===================
+async def stress(main, operations: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    discord_fake = FakeDiscord(FakeRest(0.001, 0.5, 0, 1.0, 0.0))
+    guild_id, seller_id = 10_000, 1000
+    discord_fake.guild(guild_id)
+    channel = discord_fake.get_channel(guild_id + 1)
+    manager = main.data_manager
+
+    def post(index: int) -> str:
+        message_id = next(FakeDiscord.snowflakes)
+        channel.messages[message_id] = FakeMessage(discord_fake.rest, message_id, channel, main.discord.Embed(title=f"Stress{index}"))
+        manager.add_listing(str(message_id), {
+            "ign": f"Stress{index}", "seller_id": seller_id, "bin_price": "100", "co": None,
+            "notes": f"stress listing {index}", "stats": {}, "custom_colors": {},
+            "message_id": message_id, "channel_id": channel.id, "guild_id": guild_id,
+        })
+        return str(message_id)
+
+    for index in range(50):
+        post(index)
+    accepted: Dict[str, int] = {}
+    counts = {"update": 0, "stale": 0, "sold": 0, "post": 0, "expired": 0, "clean": 0, "errors": 0}
+
+    async def update():
+        if not manager.listings:
+            return
+        listing_id = rng.choice(list(manager.listings))
+        listing = manager.listings[listing_id]
+        message = channel.messages[listing["message_id"]]
+        opened = discord_fake.interaction(seller_id, guild_id, message)
+        await main.ListingManageView(listing).update_price.callback(opened)
+        if opened.modal is None:
+            return
+        # The seller takes a moment to type while other updates land
+        await asyncio.sleep(rng.random() * 0.01)
+        opened.modal.bin_price._value = f"${rng.randint(1, 999)}"
+        submitted = discord_fake.interaction(seller_id, guild_id, message)
+        await opened.modal.on_submit(submitted)
+        if submitted.response.edited:
+            accepted[listing_id] = accepted.get(listing_id, 0) + 1
+            counts["update"] += 1
+        elif str(submitted.response.content).startswith("⚠️"):
+            counts["stale"] += 1
+
+    async def sell():
+        if len(manager.listings) < 10:
+            return
+        listing_id = rng.choice(list(manager.listings))
+        listing = manager.listings[listing_id]
+        interaction = discord_fake.interaction(seller_id, guild_id, channel.messages[listing["message_id"]])
+        await main.ListingManageView(listing).mark_sold.callback(interaction)
+        counts["sold"] += 1
+
+    async def create():
+        post(rng.randrange(10**6))
+        counts["post"] += 1
+
+    async def expired():
+        # Post Listing clicked after the interaction token expired: deferring fails
+        listing_data = {"ign": f"Expired{rng.randrange(10**6)}", "seller_id": seller_id, "bin_price": "100",
+                        "co": None, "notes": None, "stats": {}, "custom_colors": {}}
+        view = main.ListingConfirmView(main.discord.Embed(title=listing_data["ign"]), channel.id, listing_data)
+        interaction = discord_fake.interaction(seller_id, guild_id)
+        interaction.response.expired = True
+        try:
+            await view.post_listing.callback(interaction)
+        except RuntimeError:
+            counts["expired"] += 1
+
+    async def clean():
+        await main.clean_listings.callback(discord_fake.interaction(seller_id, guild_id))
+        counts["clean"] += 1
+
+    actions = [update] * 70 + [sell] * 10 + [create] * 12 + [expired] * 3 + [clean] * 5
+
+    async def run_one():
+        try:
+            await rng.choice(actions)()
+        except Exception as e:
+            counts["errors"] += 1
+            if counts["errors"] <= 5:
+                print(f"   {e!r}")
+
+    async def slow_repaint() -> bool:
+        """An accepted update whose message edit is slow must not repaint over a newer one"""
+        listing_id = post(-1)
+        message = channel.messages[manager.listings[listing_id]["message_id"]]
+
+        async def submit(price: str):
+            opened = discord_fake.interaction(seller_id, guild_id, message)
+            await main.ListingManageView(manager.listings[listing_id]).update_price.callback(opened)
+            opened.modal.bin_price._value = price
+            await opened.modal.on_submit(discord_fake.interaction(seller_id, guild_id, message))
+            accepted[listing_id] = accepted.get(listing_id, 0) + 1
+
+        message.lag = 0.05
+        first = asyncio.create_task(submit("$1"))
+        while not manager.listings[listing_id].get("version"):
+            await asyncio.sleep(0.001)
+        await submit("$2")
+        await first
+        return any(field.value == "`$2`" for field in message.embeds[0].fields)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one() for _ in range(operations)))
+    elapsed = time.perf_counter() - started
+    repaint_ordered = await slow_repaint()
+
+    lost = [listing_id for listing_id, listing in manager.listings.items()
+            if listing.get("version", 0) != accepted.get(listing_id, 0)]
+    indexed = set().union(*manager.ign_index.by_key.values()) if manager.ign_index.by_key else set()
+    # Every updated listing's message must show the price the store holds, not an older one
+    repainted = [listing_id for listing_id, listing in manager.listings.items()
+                 if listing.get("version") and not any(
+                     field.value == f"`{listing['bin_price']}`"
+                     for field in channel.messages[listing["message_id"]].embeds[0].fields)]
+    checks = {
+        "no handler errors": counts["errors"] == 0,
+        "no lost updates": not lost,
+        "ign index matches store": indexed == set(manager.listings),
+        "messages show the stored price": not repainted and repaint_ordered,
+        "locks released": not manager.locks.locks,
+        "admission slots released": main.admission.in_flight == 0,
+        "ign reservations released": not manager.ign_index.pending,
+    }
+    print(f"{operations} operations in {elapsed:.2f}s: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+    for name, passed in checks.items():
+        print(f"   {'PASS' if passed else 'FAIL'}  {name}")
+    return all(checks.values())
+
+def import_bot(workdir: str, respect_quotas: bool):
+    """Import main.py with its data files redirected into workdir"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(workdir)
+    os.environ.setdefault("LISTING_BOT_CONFIG", os.path.join(workdir, "settings.json"))
+    os.environ.setdefault("LISTING_BOT_SETTINGS", os.path.join(workdir, "bot_settings.json"))
+    if not respect_quotas:
+        unlimited = {action: [10**9, 10**9] for action in ("list", "post", "offer", "bin", "bulk")}
+        os.environ["LISTING_BOT_USER_RATE_LIMITS"] = json.dumps(unlimited)
+        os.environ["LISTING_BOT_GUILD_RATE_LIMITS"] = json.dumps(unlimited)
+    sys.path.insert(0, here)
+    import main
+    return main
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", help="JSONL trace to replay (default: synthetic)")
+    parser.add_argument("--events", type=int, default=500, help="events replayed per concurrency level")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64], help="concurrency ramp")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--guilds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rest-latency", type=float, default=0.05, help="mean simulated REST latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="latency stddev as a fraction of the mean")
+    parser.add_argument("--route-burst", type=int, default=5, help="requests per route per window before 429s (0 = off)")
+    parser.add_argument("--route-window", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a spurious 429")
+    parser.add_argument("--respect-quotas", action="store_true", help="keep the bot's per-user/guild rate limits")
+    parser.add_argument("--profile-memory", action="store_true", help="compare default and lean runtime profiles")
+    parser.add_argument("--fixture-channels", type=int, default=20, help="channels per synthetic guild")
+    parser.add_argument("--fixture-members", type=int, default=200, help="members per synthetic guild")
+    parser.add_argument("--fixture-messages", type=int, default=5000, help="channel messages sent during the fixture")
+    parser.add_argument("--cold-start", type=int, metavar="N", help="benchmark booting N listings from JSON vs snapshot")
+    parser.add_argument("--bulk", type=int, metavar="N", help="post an N-row /bulklist upload until it completes")
+    parser.add_argument("--search", type=int, metavar="N", help="measure the search index over N listings")
+    parser.add_argument("--archive", type=int, metavar="N", help="benchmark archiving N closed listings and querying them")
+    parser.add_argument("--watch", type=int, metavar="N", help="benchmark matching a listing burst against N watches")
+    parser.add_argument("--burst", type=int, default=1000, help="listings in the --watch burst")
+    parser.add_argument("--stress", type=int, metavar="N", help="run N concurrent mutations and check invariants")
+    parser.add_argument("--memory-fixture", choices=("default", "lean"), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+async def run(args):
+    workdir = tempfile.mkdtemp(prefix="listing-loadtest-")
+    main = import_bot(workdir, args.respect_quotas)
+    if args.trace:
+        trace = load_trace(args.trace)
+    else:
+        trace = synthetic_trace(max(args.events, 1000), args.users, args.guilds, args.seed)
+    random.seed(args.seed)
+
+    # Channels and messages outlive a level so later levels can act on earlier listings
+    discord_fake = FakeDiscord(FakeRest(args.rest_latency, args.jitter, args.route_burst, args.route_window, args.error_rate))
+
+    print(f"Replaying {len(trace)} trace events, {args.events} per level, data in {workdir}")
+    rows = []
+    for index, level in enumerate(args.levels):
+        rows.append(await run_level(main, discord_fake, args, trace, level, index * args.events))
+    print_report(rows)
+    return rows
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if arguments.memory_fixture:
+        bot_module = import_bot(tempfile.mkdtemp(prefix="listing-loadtest-"), respect_quotas=True)
+        print(json.dumps(asyncio.run(memory_fixture(bot_module, arguments.memory_fixture == "lean", arguments.guilds,
+                                        arguments.fixture_channels, arguments.fixture_members,
+                                        arguments.fixture_messages))))
+    elif arguments.cold_start:
+        cold_start(import_bot(tempfile.mkdtemp(prefix="listing-loadtest-"), respect_quotas=True), arguments.cold_start)
+    elif arguments.bulk:
+        bot_module = import_bot(tempfile.mkdtemp(prefix="listing-loadtest-"), respect_quotas=False)
+        sys.exit(0 if asyncio.run(bulk_benchmark(bot_module, arguments.bulk, arguments.seed)) else 1)
+    elif arguments.search:
+        bot_module = import_bot(tempfile.mkdtemp(prefix="listing-loadtest-"), respect_quotas=True)
+        sys.exit(0 if search_benchmark(bot_module, arguments.search, arguments.seed) else 1)
+    elif arguments.archive:
+        bot_module = import_bot(tempfile.mkdtemp(prefix="listing-loadtest-"), respect_quotas=True)
+        sys.exit(0 if archive_benchmark(bot_module, arguments.archive, arguments.seed) else 1)
+    elif arguments.watch:
+        bot_module = import_bot(tempfile.mkdtemp(prefix="listing-loadtest-"), respect_quotas=True)
+        sys.exit(0 if asyncio.run(watch_benchmark(bot_module, arguments.watch, arguments.burst, arguments.seed)) else 1)
+    elif arguments.stress:
+        bot_module = import_bot(tempfile.mkdtemp(prefix="listing-loadtest-"), respect_quotas=False)
+        sys.exit(0 if asyncio.run(stress(bot_module, arguments.stress, arguments.seed)) else 1)
+    elif arguments.profile_memory:
+        profile_memory(arguments)
+    else:
+        asyncio.run(run(arguments))
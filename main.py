@@ -1,8 +1,22 @@
 import os
 import re
+import gzip
 import json
+import zlib
+import math
+import mmap
+import struct
 import asyncio
-from typing import Optional, Dict, List, Tuple, Any
+import time
+import itertools
+import bisect
+import contextlib
+import csv
+import io
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from types import MappingProxyType
+from typing import Optional, Dict, List, Tuple, Any, Iterator
 from datetime import datetime, timedelta
 
 import discord
@@ -11,9 +25,44 @@ from discord.ui import View, Button, Modal, TextInput, Select
 from discord.ext import commands, tasks
 
 # =================== CONFIGURATION ===================
-TOKEN = "MTQxNDAwOTk1ODI3MzUxNTY5MQ.GYDE5m.JtM9WyS7dQMAGZ4nblmTzaapc2wmezby3Bwz2I"
-SETTINGS_FILE = "bot_settings.json"
+# Settings resolve in layers: DEFAULT_SETTINGS, then the "global" section of
+# CONFIG_FILE, then LISTING_BOT_<KEY> environment variables, then the guild's
+# section of CONFIG_FILE, then per-guild overrides saved in SETTINGS_FILE.
+ENV_PREFIX = "LISTING_BOT_"
+CONFIG_FILE = os.environ.get(f"{ENV_PREFIX}CONFIG", "settings.json")
+SETTINGS_FILE = os.environ.get(f"{ENV_PREFIX}SETTINGS", "bot_settings.json")
+CONFIG_POLL_SECONDS = 5
 LISTINGS_FILE = "active_listings.json"
+LISTINGS_SNAPSHOT_FILE = "active_listings.snap"  # set to None to always boot from JSON
+SNAPSHOT_INTERVAL_SECONDS = 300
+PRICE_HISTORY_FILE = "price_history.bin"
+ARCHIVE_DIR = "listing_archive"
+BULK_JOURNAL_DIR = "bulk_journal"
+WATCHLIST_FILE = "watchlists.json"
+DRAFTS_FILE = "listing_drafts.json"  # set to None to keep drafts in memory only
+
+# Archived records are staged per month as plain JSONL and compressed into the
+# month's segment this many at a time, or once a newer month starts
+ARCHIVE_SEAL_RECORDS = 1000
+
+# /bulklist: upload size, rows posted per run, and the longest wait for one quota token
+BULK_MAX_BYTES = 256 * 1024
+BULK_MAX_POSTS = 50
+BULK_MAX_WAIT_SECONDS = 20
+
+# Buyer watchlists: per-user cap and how alerts are batched into DMs
+WATCH_MAX_PER_USER = 10
+WATCH_ALERT_INTERVAL_SECONDS = 60
+WATCH_ALERTS_PER_DM = 10
+WATCH_PENDING_PER_USER = 50
+
+# In-progress listing drafts (least recently used are evicted beyond the cap)
+DRAFT_MAX_ENTRIES = 2000
+DRAFT_IDLE_SECONDS = 24 * 3600
+
+# Rollup retention (older buckets are dropped so queries stay bounded)
+PRICE_HISTORY_HOURLY_BUCKETS = 48
+PRICE_HISTORY_DAILY_BUCKETS = 90
 
 # Default settings
 DEFAULT_SETTINGS = {
@@ -25,8 +74,44 @@ DEFAULT_SETTINGS = {
     "listing_channel": None,
     "mod_roles": [],
     "price_format": "USD",
-    "show_detailed_stats": True
+    "show_detailed_stats": True,
+    "default_channel_id": None,
+    "enable_bedwars": True,
+    "enable_skywars": True,
+    "enable_duels": True,
+    "chroma": False,
+    "duplicate_policy": "warn",
+    # Extra channels (possibly in partner guilds) that every listing is mirrored to
+    "crosspost_channels": [],
+    # Guild ids allowed to mirror listings into this guild's channels
+    "crosspost_partners": [],
+    # Token bucket quotas per action: [burst capacity, refills per minute]
+    "user_rate_limits": {"list": [5, 5], "post": [3, 2], "offer": [5, 5], "bin": [3, 2], "bulk": [20, 10]},
+    "guild_rate_limits": {"list": [60, 60], "post": [30, 20], "offer": [60, 60], "bin": [30, 20], "bulk": [60, 30]}
 }
+
+# Cap on concurrently running expensive handlers (channel sends, DMs, full saves)
+MAX_CONCURRENT_EXPENSIVE = 32
+
+# Process-wide runtime profile: minimal intents, no message cache and lazy member lookups
+LEAN_MODE = os.environ.get(f"{ENV_PREFIX}LEAN_MODE", "").strip().lower() in ("1", "true", "yes")
+
+# Cross-posting: worker pool size and per-channel send budget
+FANOUT_WORKERS = 4
+CHANNEL_SEND_BURST = 5
+CHANNEL_SENDS_PER_SECOND = 1.0
+
+# Seller lookups that miss the member cache are fetched and kept briefly
+SELLER_CACHE_SIZE = 1000
+SELLER_CACHE_TTL_SECONDS = 300
+
+# Discord fails an interaction that is not acknowledged within 3 seconds
+ACK_BUDGET_SECONDS = 1.5
+
+DUPLICATE_POLICIES = ("allow", "warn", "block")
+
+# Keys from older config files that map onto current settings
+LEGACY_SETTING_ALIASES = {"primary_color": "embed_color"}
 def parse_price(value: str) -> Optional[float]:
     """Extract numeric price from strings like '$50', '50 USD', '75'"""
     if not value:
@@ -91,10 +176,420 @@ DUELS_TITLES = [
 ]
 
 # =================== DATA STORAGE ===================
+class ListingIndex:
+    """Case-insensitive IGN (and UUID, when known) index over listings.
+
+    In-flight posts reserve their keys so two concurrent posts of the same
+    account see each other before either has been written to the store.
+    """
+    def __init__(self):
+        self.by_key: Dict[str, set] = {}
+        self.pending: Dict[str, int] = {}
+    
+    @staticmethod
+    def keys_for(listing: Dict) -> List[str]:
+        keys = [f"ign:{str(listing.get('ign', '')).strip().lower()}"]
+        if listing.get("uuid"):
+            keys.append(f"uuid:{str(listing['uuid']).replace('-', '').lower()}")
+        return keys
+    
+    def add(self, listing_id: str, listing: Dict):
+        for key in self.keys_for(listing):
+            self.by_key.setdefault(key, set()).add(listing_id)
+    
+    def remove(self, listing_id: str, listing: Dict):
+        for key in self.keys_for(listing):
+            ids = self.by_key.get(key)
+            if ids:
+                ids.discard(listing_id)
+                if not ids:
+                    del self.by_key[key]
+    
+    def lookup(self, listing: Dict) -> Tuple[set, bool]:
+        """Return (existing listing ids, whether a post is in flight) for an account"""
+        found = set()
+        in_flight = False
+        for key in self.keys_for(listing):
+            found |= self.by_key.get(key, set())
+            in_flight = in_flight or key in self.pending
+        return found, in_flight
+    
+    def reserve(self, listing: Dict) -> List[str]:
+        keys = self.keys_for(listing)
+        for key in keys:
+            self.pending[key] = self.pending.get(key, 0) + 1
+        return keys
+    
+    def release(self, keys: List[str]):
+        for key in keys:
+            count = self.pending.get(key, 0) - 1
+            if count > 0:
+                self.pending[key] = count
+            else:
+                self.pending.pop(key, None)
+    
+    def duplicates(self) -> List[set]:
+        seen = set()
+        groups = []
+        for ids in self.by_key.values():
+            if len(ids) > 1:
+                group = frozenset(ids)
+                if group not in seen:
+                    seen.add(group)
+                    groups.append(set(ids))
+        return groups
+
+def freeze_settings(value: Any) -> Any:
+    """Turn a resolved settings tree into a read-only snapshot"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze_settings(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze_settings(item) for item in value)
+    return value
+
+def merge_settings(base: Dict, overrides: Dict) -> Dict:
+    merged = dict(base)
+    for key, value in overrides.items():
+        key = LEGACY_SETTING_ALIASES.get(key, key)
+        if isinstance(value, dict) and isinstance(merged.get(key), (dict, MappingProxyType)):
+            value = {**merged[key], **value}
+        merged[key] = value
+    return merged
+
+def env_settings() -> Dict:
+    overrides = {}
+    for key in DEFAULT_SETTINGS:
+        raw = os.environ.get(ENV_PREFIX + key.upper())
+        if raw is None:
+            continue
+        try:
+            overrides[key] = json.loads(raw)
+        except json.JSONDecodeError:
+            overrides[key] = raw
+    return overrides
+
+class PrefixTrie:
+    """Path-compressed prefix trie that keeps ids only on the node where their term ends.
+
+    Each node is reached by an edge labelled with one or more characters, so
+    chains of single-child nodes collapse into one. A lookup walks the prefix,
+    then the subtree below it depth-first. Empty branches are pruned, so every
+    branch ends in stored ids and reading `limit` ids visits a bounded number
+    of nodes, however many terms are stored.
+    """
+    __slots__ = ("label", "children", "ids")
+    
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.children: Dict[str, "PrefixTrie"] = {}
+        self.ids: Optional[set] = None
+    
+    def add(self, term: str, item_id: str):
+        node = self
+        while term:
+            child = node.children.get(term[0])
+            if child is None:
+                child = node.children[term[0]] = PrefixTrie(term)
+                term = ""
+            else:
+                common = 1
+                while common < min(len(term), len(child.label)) and term[common] == child.label[common]:
+                    common += 1
+                if common < len(child.label):
+                    # Split the edge where the new term branches off
+                    head = node.children[term[0]] = PrefixTrie(child.label[:common])
+                    child.label = child.label[common:]
+                    head.children[child.label[0]] = child
+                    child = head
+                term = term[common:]
+            node = child
+        if node.ids is None:
+            node.ids = set()
+        node.ids.add(item_id)
+    
+    def remove(self, term: str, item_id: str):
+        path = [self]
+        while term:
+            child = path[-1].children.get(term[0])
+            if child is None or not term.startswith(child.label):
+                return
+            path.append(child)
+            term = term[len(child.label):]
+        node = path[-1]
+        if node.ids is not None:
+            node.ids.discard(item_id)
+            if not node.ids:
+                node.ids = None
+        # Prune branches that no longer lead anywhere, then re-merge single-child chains
+        for depth in range(len(path) - 1, 0, -1):
+            node, parent = path[depth], path[depth - 1]
+            if node.ids:
+                break
+            if not node.children:
+                del parent.children[node.label[0]]
+            elif len(node.children) == 1:
+                (child,) = node.children.values()
+                node.label += child.label
+                node.children, node.ids = child.children, child.ids
+                break
+            else:
+                break
+    
+    def get(self, term: str) -> set:
+        """Ids stored under exactly this term"""
+        node = self
+        while term:
+            node = node.children.get(term[0])
+            if node is None or not term.startswith(node.label):
+                return set()
+            term = term[len(node.label):]
+        return node.ids or set()
+    
+    def find(self, prefix: str) -> Iterator[str]:
+        """Lazily yield the ids of every term starting with prefix"""
+        node = self
+        while prefix:
+            node = node.children.get(prefix[0])
+            if node is None:
+                return
+            if not prefix.startswith(node.label):
+                # The prefix ends part-way along this edge: everything below matches
+                if node.label.startswith(prefix):
+                    break
+                return
+            prefix = prefix[len(node.label):]
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.ids:
+                yield from node.ids
+            stack.extend(node.children.values())
+
+class SearchIndex:
+    """IGN prefix trie plus a token trie over listing notes that doubles as their inverted index"""
+    MAX_TOKEN_LENGTH = 20
+    # Only the first distinct words of a listing's notes are indexed, bounding memory per listing
+    MAX_NOTE_TOKENS = 24
+    MAX_CANDIDATES = 500
+    
+    def __init__(self):
+        self.igns = PrefixTrie()
+        self.note_tokens = PrefixTrie()
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        return text.strip().lower()
+    
+    @classmethod
+    def tokenize(cls, text: Optional[str]) -> List[str]:
+        tokens = re.findall(r"[a-z0-9]+", (text or "").lower())
+        return list(dict.fromkeys(token[:cls.MAX_TOKEN_LENGTH] for token in tokens if len(token) > 1))
+    
+    def add(self, listing_id: str, listing: Dict):
+        self.igns.add(self.normalize(listing.get("ign", "")), listing_id)
+        for token in self.tokenize(listing.get("notes"))[:self.MAX_NOTE_TOKENS]:
+            self.note_tokens.add(token, listing_id)
+    
+    def remove(self, listing_id: str, listing: Dict):
+        self.igns.remove(self.normalize(listing.get("ign", "")), listing_id)
+        for token in self.tokenize(listing.get("notes"))[:self.MAX_NOTE_TOKENS]:
+            self.note_tokens.remove(token, listing_id)
+    
+    def suggest_ids(self, prefix: str, limit: int) -> List[str]:
+        return list(itertools.islice(self.igns.find(self.normalize(prefix)), limit))
+    
+    def search(self, query: str, limit: int) -> List[str]:
+        """Listing ids whose IGN starts with the query or whose notes contain all its words.
+
+        The last word is treated as a prefix since the user may still be typing it.
+        """
+        normalized = self.normalize(query)
+        results = list(itertools.islice(self.igns.find(normalized), limit)) if normalized else []
+        tokens = re.findall(r"[a-z0-9]+", normalized)
+        if not tokens or len(results) >= limit:
+            return results
+        
+        required = [self.note_tokens.get(token[:self.MAX_TOKEN_LENGTH]) for token in tokens[:-1]]
+        candidates = self.note_tokens.find(tokens[-1][:self.MAX_TOKEN_LENGTH])
+        seen = set(results)
+        for listing_id in itertools.islice(candidates, self.MAX_CANDIDATES):
+            if listing_id not in seen and all(listing_id in ids for ids in required):
+                results.append(listing_id)
+                seen.add(listing_id)
+                if len(results) >= limit:
+                    break
+        return results
+
+class ListingSnapshot:
+    """Compact binary copy of the listings file that can be memory-mapped.
+
+    Layout: a header (magic, record count, index offset, and the byte size and
+    CRC-32 of the JSON save it mirrors), the records as uint32-length-prefixed
+    compact JSON, then the index of (uint16 key length, uint64 record offset,
+    key) entries in file order.
+    """
+    MAGIC = b"PLSNAP02"
+    HEADER = struct.Struct("<8sIQQI")
+    LENGTH = struct.Struct("<I")
+    INDEX_ENTRY = struct.Struct("<HQ")
+    
+    @classmethod
+    def write(cls, path: str, listings: "MutableMapping[str, Dict]", json_digest: Tuple[int, int]):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, 0, 0, 0, 0))
+            offsets = []
+            for listing_id, listing in listings.items():
+                offsets.append((listing_id, f.tell()))
+                record = json.dumps(listing, separators=(",", ":")).encode("utf-8")
+                f.write(cls.LENGTH.pack(len(record)))
+                f.write(record)
+            
+            index_offset = f.tell()
+            for listing_id, offset in offsets:
+                raw_id = listing_id.encode("utf-8")
+                f.write(cls.INDEX_ENTRY.pack(len(raw_id), offset))
+                f.write(raw_id)
+            
+            f.seek(0)
+            f.write(cls.HEADER.pack(cls.MAGIC, len(offsets), index_offset, *json_digest))
+        # Replace rather than rewrite so a live mapping of the old file stays valid
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def json_digest(cls, path: str) -> Optional[Tuple[int, int]]:
+        """(size, CRC-32) of the JSON save recorded in a snapshot header"""
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(cls.HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(header) < cls.HEADER.size:
+            return None
+        magic, _, _, size, crc = cls.HEADER.unpack(header)
+        return (size, crc) if magic == cls.MAGIC else None
+
+class LazyListings(MutableMapping):
+    """Listings backed by a mapped snapshot; each record is decoded on first access"""
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, offset, _, _ = ListingSnapshot.HEADER.unpack_from(self._mm, 0)
+        if magic != ListingSnapshot.MAGIC:
+            raise ValueError(f"{path} is not a listings snapshot")
+        
+        # Values are either decoded listings or the int offset of their encoded record
+        self._data: Dict[str, Any] = {}
+        for _ in range(count):
+            key_length, record_offset = ListingSnapshot.INDEX_ENTRY.unpack_from(self._mm, offset)
+            offset += ListingSnapshot.INDEX_ENTRY.size
+            self._data[self._mm[offset:offset + key_length].decode("utf-8")] = record_offset
+            offset += key_length
+    
+    def __getitem__(self, listing_id: str) -> Dict:
+        value = self._data[listing_id]
+        if isinstance(value, int):
+            (length,) = ListingSnapshot.LENGTH.unpack_from(self._mm, value)
+            start = value + ListingSnapshot.LENGTH.size
+            value = self._data[listing_id] = json.loads(self._mm[start:start + length])
+        return value
+    
+    def __setitem__(self, listing_id: str, listing: Dict):
+        self._data[listing_id] = listing
+    
+    def __delitem__(self, listing_id: str):
+        del self._data[listing_id]
+    
+    def __iter__(self):
+        return iter(self._data)
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __contains__(self, listing_id) -> bool:
+        return listing_id in self._data
+
+class StaleListingError(Exception):
+    """Raised when a listing changed after the caller read the version it is updating"""
+
+class ListingLocks:
+    """Per-listing asyncio locks, dropped again once nobody holds or waits on them"""
+    def __init__(self):
+        self.locks: Dict[str, List] = {}
+    
+    @contextlib.asynccontextmanager
+    async def hold(self, listing_id: str):
+        entry = self.locks.setdefault(listing_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.locks[listing_id]
+
 class DataManager:
     def __init__(self):
+        self.config = self.load_config()
         self.settings = self.load_settings()
+        self.config_mtimes = self.settings_mtimes()
+        self.rebuild_snapshots()
+        # (size, CRC-32) of the JSON file as last loaded or saved; snapshots record it
+        self.json_digest: Tuple[int, int] = (0, 0)
         self.listings = self.load_listings()
+        self.locks = ListingLocks()
+        # Listing dicts are replaced, never mutated in place, so a snapshot stays valid
+        # until the next write; the generation tells when the cached one is stale
+        self.generation = 0
+        self._snapshot: Tuple[int, Tuple[Tuple[str, Dict], ...]] = (-1, ())
+        # Booting from JSON means the snapshot is missing or out of date
+        self.snapshot_stale = not isinstance(self.listings, LazyListings)
+        self._ign_index = ListingIndex()
+        self._search_index = SearchIndex()
+        # Mirror message id -> listing id for cross-posted copies
+        self._message_index: Dict[str, str] = {}
+        # Listings booted from a snapshot are indexed in the background (or on first index use)
+        self.unindexed: Optional[List[str]] = None
+        if isinstance(self.listings, LazyListings):
+            self.unindexed = list(self.listings)
+        else:
+            for listing_id, listing in self.listings.items():
+                self.index_listing(listing_id, listing)
+    
+    def ensure_indexed(self, budget: Optional[int] = None) -> bool:
+        """Index listings not yet indexed (at most `budget` of them); return True when done"""
+        pending = self.unindexed
+        if pending is None:
+            return True
+        while pending and budget != 0:
+            listing_id = pending.pop()
+            if listing_id in self.listings:
+                self.index_listing(listing_id, self.listings[listing_id])
+            if budget is not None:
+                budget -= 1
+        if not pending:
+            self.unindexed = None
+        return self.unindexed is None
+    
+    async def warm_indexes(self, batch: int = 2000):
+        while not self.ensure_indexed(batch):
+            await asyncio.sleep(0)
+    
+    @property
+    def ign_index(self) -> ListingIndex:
+        self.ensure_indexed()
+        return self._ign_index
+    
+    @property
+    def search_index(self) -> SearchIndex:
+        self.ensure_indexed()
+        return self._search_index
+    
+    @property
+    def message_index(self) -> Dict[str, str]:
+        self.ensure_indexed()
+        return self._message_index
     
     def load_settings(self) -> Dict:
         try:
@@ -106,27 +601,1219 @@ class DataManager:
     def save_settings(self):
         with open(SETTINGS_FILE, 'w') as f:
             json.dump(self.settings, f, indent=2)
+        self.config_mtimes = self.settings_mtimes()
     
-    def load_listings(self) -> Dict:
+    def load_config(self) -> Dict:
         try:
-            with open(LISTINGS_FILE, 'r') as f:
+            with open(CONFIG_FILE, 'r') as f:
                 return json.load(f)
         except FileNotFoundError:
             return {}
     
-    def save_listings(self):
-        with open(LISTINGS_FILE, 'w') as f:
-            json.dump(self.listings, f, indent=2)
+    @staticmethod
+    def settings_mtimes() -> Tuple[float, float]:
+        mtimes = []
+        for path in (CONFIG_FILE, SETTINGS_FILE):
+            try:
+                mtimes.append(os.stat(path).st_mtime)
+            except FileNotFoundError:
+                mtimes.append(0.0)
+        return tuple(mtimes)
+    
+    def reload_if_changed(self) -> bool:
+        """Hot-swap settings snapshots when either settings file changed on disk"""
+        mtimes = self.settings_mtimes()
+        if mtimes == self.config_mtimes:
+            return False
+        # Recorded even if the files are invalid, so a bad edit is reported once, not every poll
+        self.config_mtimes = mtimes
+        try:
+            config, settings = self.load_config(), self.load_settings()
+        except json.JSONDecodeError as e:
+            # Keep serving the previous snapshots until the file is valid again
+            print(f"Ignoring invalid settings file: {e}")
+            return False
+        self.config, self.settings = config, settings
+        self.rebuild_snapshots()
+        return True
+    
+    def rebuild_snapshots(self):
+        resolved = merge_settings(DEFAULT_SETTINGS, self.config.get("global", {}))
+        self.base_settings = merge_settings(resolved, env_settings())
+        self.global_settings = freeze_settings(self.base_settings)
+        # Guild snapshots are resolved on first use
+        self.guild_snapshots: Dict[str, MappingProxyType] = {}
+    
+    @property
+    def token(self) -> Optional[str]:
+        return os.environ.get("DISCORD_TOKEN") or self.config.get("token")
+    
+    def load_listings(self) -> "MutableMapping[str, Dict]":
+        try:
+            with open(LISTINGS_FILE, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            raw = None
+        
+        snapshot_digest = ListingSnapshot.json_digest(LISTINGS_SNAPSHOT_FILE) if LISTINGS_SNAPSHOT_FILE else None
+        # The snapshot is only used when it mirrors exactly the JSON on disk; checksumming
+        # the raw bytes is far cheaper than parsing them, and immune to coarse mtimes
+        if snapshot_digest is not None and (raw is None or snapshot_digest == (len(raw), zlib.crc32(raw))):
+            try:
+                listings = LazyListings(LISTINGS_SNAPSHOT_FILE)
+                self.json_digest = snapshot_digest
+                return listings
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Ignoring listings snapshot: {e}")
+        
+        if raw is None:
+            return {}
+        self.json_digest = (len(raw), zlib.crc32(raw))
+        return json.loads(raw)
     
-    def get_guild_settings(self, guild_id: int) -> Dict:
-        return self.settings.get(str(guild_id), DEFAULT_SETTINGS.copy())
+    def save_listings(self):
+        listings = self.listings if isinstance(self.listings, dict) else dict(self.listings.items())
+        raw = json.dumps(listings, indent=2).encode("utf-8")
+        with open(LISTINGS_FILE, 'wb') as f:
+            f.write(raw)
+        self.json_digest = (len(raw), zlib.crc32(raw))
+        self.snapshot_stale = True
+    
+    def save_snapshot(self):
+        if not LISTINGS_SNAPSHOT_FILE or not self.snapshot_stale:
+            return
+        ListingSnapshot.write(LISTINGS_SNAPSHOT_FILE, self.listings, self.json_digest)
+        self.snapshot_stale = False
+    
+    def index_listing(self, listing_id: str, listing: Dict):
+        self._ign_index.add(listing_id, listing)
+        self._search_index.add(listing_id, listing)
+        for mirror in listing.get("mirrors", []):
+            self._message_index[str(mirror["message_id"])] = listing_id
+    
+    def unindex_listing(self, listing_id: str, listing: Dict):
+        self._ign_index.remove(listing_id, listing)
+        self._search_index.remove(listing_id, listing)
+        for mirror in listing.get("mirrors", []):
+            self._message_index.pop(str(mirror["message_id"]), None)
+    
+    def add_listing(self, listing_id: str, listing: Dict):
+        previous = self.listings.get(listing_id)
+        if previous is not None:
+            self.unindex_listing(listing_id, previous)
+        self.listings[listing_id] = listing
+        self.index_listing(listing_id, listing)
+        self.generation += 1
+    
+    def add_listings(self, listings: Dict[str, Dict]):
+        """Store several listings without yielding, so readers see all of them or none"""
+        for listing_id, listing in listings.items():
+            self.add_listing(listing_id, listing)
+    
+    def remove_listing(self, listing_id: str) -> Optional[Dict]:
+        listing = self.listings.pop(listing_id, None)
+        if listing is not None:
+            self.unindex_listing(listing_id, listing)
+            self.generation += 1
+        return listing
+    
+    def update_listing(self, listing_id: str, changes: Dict, expected_version: Optional[int] = None) -> Optional[Dict]:
+        """Replace a listing with a changed copy and bump its version.
+
+        Returns None if the listing is gone and raises StaleListingError if
+        expected_version no longer matches the stored version.
+        """
+        current = self.listings.get(listing_id)
+        if current is None:
+            return None
+        if expected_version is not None and current.get("version", 0) != expected_version:
+            raise StaleListingError(listing_id)
+        if not changes:
+            return current
+        updated = {**current, **changes, "version": current.get("version", 0) + 1}
+        self.add_listing(listing_id, updated)
+        return updated
+    
+    def listings_snapshot(self) -> Tuple[Tuple[str, Dict], ...]:
+        """Stable (listing_id, listing) pairs for scans that await between items"""
+        generation, items = self._snapshot
+        if generation != self.generation:
+            items = tuple(self.listings.items())
+            self._snapshot = (self.generation, items)
+        return items
+    
+    def add_mirrors(self, listing_id: str, mirrors: List[Dict]) -> bool:
+        listing = self.listings.get(listing_id)
+        if listing is None:
+            return False
+        self.add_listing(listing_id, {**listing, "mirrors": listing.get("mirrors", []) + mirrors})
+        return True
+    
+    def resolve_listing_id(self, message_id: int) -> str:
+        """Map a posted or mirrored message id to its listing id"""
+        return self.message_index.get(str(message_id), str(message_id))
+    
+    def get_guild_settings(self, guild_id: Optional[int]) -> MappingProxyType:
+        """Return the resolved, read-only settings snapshot for a guild"""
+        key = str(guild_id)
+        snapshot = self.guild_snapshots.get(key)
+        if snapshot is None:
+            file_section, overrides = self.config.get(key), self.settings.get(key)
+            if not file_section and not overrides:
+                return self.global_settings
+            resolved = merge_settings(self.base_settings, file_section or {})
+            snapshot = self.guild_snapshots[key] = freeze_settings(merge_settings(resolved, overrides or {}))
+        return snapshot
     
     def update_guild_settings(self, guild_id: int, new_settings: Dict):
-        self.settings[str(guild_id)] = {**self.get_guild_settings(guild_id), **new_settings}
+        key = str(guild_id)
+        self.settings[key] = {**self.settings.get(key, {}), **new_settings}
+        self.guild_snapshots.pop(key, None)
         self.save_settings()
 
 data_manager = DataManager()
 
+# =================== ADMISSION CONTROL ===================
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+    
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+    
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self) -> float:
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+class AdmissionController:
+    """Per-user and per-guild token buckets plus a global cap on expensive work"""
+    MAX_BUCKETS = 50000
+    
+    def __init__(self, max_concurrent: int):
+        self.buckets: Dict[Tuple[str, str, int], TokenBucket] = {}
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+    
+    def _bucket(self, scope: str, action: str, owner_id: int, quota: List[float], now: float) -> TokenBucket:
+        capacity, per_minute = quota
+        key = (scope, action, owner_id)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(capacity, per_minute / 60, now)
+        else:
+            # Quotas can change at runtime through guild settings
+            bucket.capacity, bucket.rate = capacity, per_minute / 60
+            bucket.refill(now)
+        return bucket
+    
+    def check(self, action: str, user_id: int, guild_id: Optional[int]) -> float:
+        """Consume one token from the user and guild buckets; return 0 or the seconds to wait"""
+        now = time.monotonic()
+        if len(self.buckets) > self.MAX_BUCKETS:
+            self.prune(now)
+        
+        settings = data_manager.get_guild_settings(guild_id)
+        buckets = [self._bucket(
+            "user", action, user_id,
+            settings.get("user_rate_limits", {}).get(action, DEFAULT_SETTINGS["user_rate_limits"][action]), now
+        )]
+        if guild_id is not None:
+            buckets.append(self._bucket(
+                "guild", action, guild_id,
+                settings.get("guild_rate_limits", {}).get(action, DEFAULT_SETTINGS["guild_rate_limits"][action]), now
+            ))
+        
+        wait = max(bucket.wait_time() for bucket in buckets)
+        if wait == 0:
+            for bucket in buckets:
+                bucket.tokens -= 1
+        return wait
+    
+    def prune(self, now: float):
+        # Full buckets carry no state worth keeping
+        for key, bucket in list(self.buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self.buckets[key]
+    
+    def try_enter(self) -> bool:
+        if self.in_flight >= self.max_concurrent:
+            return False
+        self.in_flight += 1
+        return True
+    
+    def leave(self):
+        self.in_flight -= 1
+
+admission = AdmissionController(MAX_CONCURRENT_EXPENSIVE)
+
+async def reject_if_limited(interaction: discord.Interaction, action: str) -> bool:
+    """Send a fast rejection and return True when the caller is over quota"""
+    wait = admission.check(action, interaction.user.id, interaction.guild_id)
+    if not wait:
+        return False
+    retry = "later" if math.isinf(wait) else f"in {math.ceil(wait)}s"
+    await interaction.response.send_message(f"⏳ You're doing that too often. Try again {retry}.", ephemeral=True)
+    return True
+
+async def reject_if_busy(interaction: discord.Interaction) -> bool:
+    """Claim a global concurrency slot, or send a fast rejection and return True"""
+    if admission.try_enter():
+        return False
+    await interaction.response.send_message("⏳ The bot is busy right now. Please try again in a moment.", ephemeral=True)
+    return True
+
+# =================== CROSS-POSTING ===================
+class FanoutDispatcher:
+    """Bounded worker pool for mirrored listing sends and edits.
+
+    Sends and edits are throttled per channel. Edits queued for the same
+    message are merged so only the latest state is sent.
+    """
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+        self.pending_edits: Dict[Tuple[int, int], Dict] = {}
+        self.channel_buckets: Dict[int, TokenBucket] = {}
+        self.background: set = set()
+    
+    def ensure_workers(self):
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+            self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+    
+    async def throttle(self, channel_id: int):
+        bucket = self.channel_buckets.get(channel_id)
+        if bucket is None:
+            bucket = self.channel_buckets[channel_id] = TokenBucket(CHANNEL_SEND_BURST, CHANNEL_SENDS_PER_SECOND, time.monotonic())
+        while True:
+            bucket.refill(time.monotonic())
+            wait = bucket.wait_time()
+            if not wait:
+                bucket.tokens -= 1
+                return
+            await asyncio.sleep(wait)
+    
+    async def worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self.run_job(*job)
+            except Exception as e:
+                print(f"Cross-post job failed: {e}")
+            finally:
+                self.queue.task_done()
+    
+    async def run_job(self, kind: str, channel, payload, future: Optional[asyncio.Future] = None):
+        await self.throttle(channel.id)
+        if kind == "send":
+            try:
+                message = await channel.send(**payload())
+            except Exception as e:
+                future.set_exception(e)
+                return
+            future.set_result({"guild_id": channel.guild.id, "channel_id": channel.id, "message_id": message.id})
+        elif kind == "delete":
+            await channel.get_partial_message(payload).delete()
+        else:
+            kwargs = self.pending_edits.pop((channel.id, payload), None)
+            if kwargs is not None:
+                await channel.get_partial_message(payload).edit(**kwargs)
+    
+    @staticmethod
+    def mirror_channels(client: discord.Client, guild_id: int, exclude: int) -> List[Any]:
+        """Resolve configured mirror channels the target guilds have agreed to receive"""
+        channels = []
+        for channel_id in data_manager.get_guild_settings(guild_id).get("crosspost_channels", ()):
+            channel = client.get_channel(int(channel_id))
+            if channel is None or channel.id == exclude:
+                continue
+            target_guild = channel.guild.id
+            # Snowflakes are often stored as JSON strings; compare as ints
+            partners = {int(partner) for partner in data_manager.get_guild_settings(target_guild).get("crosspost_partners", ())}
+            if target_guild != int(guild_id) and int(guild_id) not in partners:
+                continue
+            channels.append(channel)
+        return channels
+    
+    def post(self, client: discord.Client, listing_id: str, listing_data: Dict, embed: discord.Embed, exclude: int):
+        """Mirror a freshly posted listing and record the mirror message ids once they are sent"""
+        channels = self.mirror_channels(client, listing_data["guild_id"], exclude)
+        if not channels:
+            return
+        self.ensure_workers()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for channel in channels:
+            future = loop.create_future()
+            self.queue.put_nowait(("send", channel, lambda: {"embed": embed, "view": ListingManageView(listing_data)}, future))
+            futures.append(future)
+        task = asyncio.create_task(self.record_mirrors(client, listing_id, futures))
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+    
+    async def record_mirrors(self, client: discord.Client, listing_id: str, futures: List[asyncio.Future]):
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        mirrors = [result for result in results if isinstance(result, dict)]
+        if not mirrors:
+            return
+        if data_manager.add_mirrors(listing_id, mirrors):
+            data_manager.save_listings()
+            return
+        # The listing was sold or cleaned while the mirrors were in flight; take them down
+        for mirror in mirrors:
+            channel = client.get_channel(mirror["channel_id"])
+            if channel is not None:
+                self.queue.put_nowait(("delete", channel, mirror["message_id"]))
+    
+    def edit(self, client: discord.Client, listing: Dict, exclude_message_id: int, **kwargs):
+        """Queue an edit of every copy of a listing except the message the user interacted with"""
+        targets = [(listing.get("channel_id"), listing.get("message_id"))]
+        targets += [(mirror["channel_id"], mirror["message_id"]) for mirror in listing.get("mirrors", [])]
+        for channel_id, message_id in targets:
+            if not message_id or message_id == exclude_message_id:
+                continue
+            channel = client.get_channel(channel_id)
+            if channel is None:
+                continue
+            key = (channel.id, message_id)
+            if key in self.pending_edits:
+                self.pending_edits[key].update(kwargs)
+                continue
+            self.ensure_workers()
+            self.pending_edits[key] = dict(kwargs)
+            self.queue.put_nowait(("edit", channel, message_id))
+
+fanout = FanoutDispatcher(FANOUT_WORKERS)
+
+# =================== INTERACTION RESPONSES ===================
+class ResponseStats:
+    """Per-command handler latency (EWMA) and how often the ack had to be deferred"""
+    def __init__(self):
+        self.commands: Dict[str, Dict[str, float]] = {}
+    
+    def record(self, command: str, elapsed: float, deferred: bool):
+        entry = self.commands.setdefault(command, {"calls": 0, "deferred": 0, "latency": elapsed})
+        entry["calls"] += 1
+        entry["deferred"] += int(deferred)
+        entry["latency"] += 0.2 * (elapsed - entry["latency"])
+    
+    def expects_slow(self, command: str) -> bool:
+        entry = self.commands.get(command)
+        return bool(entry) and entry["calls"] >= 3 and entry["latency"] > ACK_BUDGET_SECONDS * 0.8
+
+response_stats = ResponseStats()
+
+class InteractionResponder:
+    """Acknowledge an interaction before Discord's deadline and send results as followups.
+
+    Handlers declared slow (or observed to be slow) are deferred up front; any
+    other handler is deferred by a watchdog once ACK_BUDGET_SECONDS elapse.
+    With update=True the deferral acknowledges a component interaction as an
+    edit of its message, which edit() then applies.
+    """
+    def __init__(self, interaction: discord.Interaction, command: str, slow: bool = False,
+                 ephemeral: bool = True, update: bool = False):
+        self.interaction = interaction
+        self.command = command
+        self.slow = slow
+        self.ephemeral = ephemeral
+        self.update = update
+        self.deferred = False
+        self._lock = asyncio.Lock()
+        self._watchdog: Optional[asyncio.Task] = None
+    
+    async def __aenter__(self):
+        self.started = time.monotonic()
+        if self.slow or response_stats.expects_slow(self.command):
+            await self.defer()
+        else:
+            self._watchdog = asyncio.create_task(self._defer_at_deadline())
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._watchdog:
+            self._watchdog.cancel()
+        response_stats.record(self.command, time.monotonic() - self.started, self.deferred)
+        return False
+    
+    async def _defer_at_deadline(self):
+        await asyncio.sleep(ACK_BUDGET_SECONDS)
+        await self.defer()
+    
+    async def defer(self):
+        async with self._lock:
+            if not self.interaction.response.is_done():
+                if self.update:
+                    await self.interaction.response.defer()
+                else:
+                    await self.interaction.response.defer(ephemeral=self.ephemeral, thinking=True)
+                self.deferred = True
+    
+    async def send(self, content: Optional[str] = None, **kwargs):
+        if content is not None:
+            kwargs["content"] = content
+        async with self._lock:
+            if self.interaction.response.is_done():
+                await self.interaction.followup.send(ephemeral=self.ephemeral, **kwargs)
+            else:
+                await self.interaction.response.send_message(ephemeral=self.ephemeral, **kwargs)
+    
+    async def edit(self, **kwargs):
+        """Edit the message the interaction came from"""
+        async with self._lock:
+            if self.interaction.response.is_done():
+                await self.interaction.edit_original_response(**kwargs)
+            else:
+                await self.interaction.response.edit_message(**kwargs)
+
+# =================== MEMBER LOOKUPS ===================
+class SellerCache:
+    """Small TTL cache for sellers that are not in the gateway member cache"""
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.users: "OrderedDict[int, Tuple[float, discord.abc.User]]" = OrderedDict()
+    
+    async def get(self, interaction: discord.Interaction, user_id: int) -> Optional[discord.abc.User]:
+        member = interaction.guild.get_member(user_id) if interaction.guild else None
+        if member is not None:
+            return member
+        
+        now = time.monotonic()
+        cached = self.users.get(user_id)
+        if cached and cached[0] > now:
+            self.users.move_to_end(user_id)
+            return cached[1]
+        
+        try:
+            user = await interaction.client.fetch_user(user_id)
+        except discord.HTTPException:
+            return None
+        self.users[user_id] = (now + self.ttl, user)
+        self.users.move_to_end(user_id)
+        while len(self.users) > self.max_entries:
+            self.users.popitem(last=False)
+        return user
+
+seller_cache = SellerCache(SELLER_CACHE_SIZE, SELLER_CACHE_TTL_SECONDS)
+
+# =================== PRICE HISTORY ===================
+class PriceHistoryStore:
+    """Append-only log of price points plus hourly/daily min/max/last rollups.
+
+    Raw points are fixed-width records (timestamp, ign, bin, co) appended to a
+    single file. Rollups are maintained incrementally, so queries never touch
+    the raw log, and are checkpointed next to it with the log offset they
+    cover; startup loads the checkpoint and replays only the records after it.
+    """
+    RECORD = struct.Struct("<d16sdd")
+    IGN_BYTES = 16
+
+    def __init__(self, path: str):
+        self.path = path
+        self.checkpoint_path = path + ".rollups.json"
+        self.hourly: Dict[str, Dict[int, List[Optional[float]]]] = {}
+        self.daily: Dict[str, Dict[int, List[Optional[float]]]] = {}
+        # Bytes of the log folded into the rollups, and the last record folded (to spot a replaced log)
+        self.offset = 0
+        self.last_record = b""
+        self.dirty = False
+        self.load()
+
+    @staticmethod
+    def normalize_ign(ign: str) -> str:
+        return ign.strip().lower()
+
+    def load(self):
+        try:
+            f = open(self.path, 'r+b')
+        except FileNotFoundError:
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            usable = size - size % self.RECORD.size
+            if usable != size:
+                # Drop a torn trailing record so later appends stay aligned
+                f.truncate(usable)
+            if not usable:
+                return
+            with mmap.mmap(f.fileno(), usable, access=mmap.ACCESS_READ) as mm:
+                start = self.load_checkpoint(mm, usable)
+                for offset in range(start, usable, self.RECORD.size):
+                    ts, raw_ign, bin_value, co_value = self.RECORD.unpack_from(mm, offset)
+                    ign = raw_ign.rstrip(b"\0").decode("utf-8", "ignore")
+                    self._apply(ign, ts, bin_value, co_value)
+                self.offset = usable
+                self.last_record = mm[usable - self.RECORD.size:usable]
+        self.dirty = start != usable
+
+    def load_checkpoint(self, mm: mmap.mmap, usable: int) -> int:
+        """Restore checkpointed rollups if they match the log; return the offset to replay from"""
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+            offset = checkpoint["offset"]
+            last_record = bytes.fromhex(checkpoint["last_record"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
+            return 0
+        if not offset or offset > usable or offset % self.RECORD.size or \
+                mm[offset - self.RECORD.size:offset] != last_record:
+            return 0
+        for name, rollups in (("hourly", self.hourly), ("daily", self.daily)):
+            for ign, buckets in checkpoint[name].items():
+                rollups[ign] = {int(start): bucket for start, bucket in buckets.items()}
+        return offset
+
+    def flush(self):
+        """Checkpoint the rollups and the log offset they cover"""
+        if not self.dirty:
+            return
+        checkpoint = {"offset": self.offset, "last_record": self.last_record.hex(),
+                      "hourly": self.hourly, "daily": self.daily}
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, self.checkpoint_path)
+        self.dirty = False
+
+    def record(self, ign: str, bin_price: Optional[str], co: Optional[str], timestamp: Optional[float] = None):
+        """Append a price point for an account and fold it into the rollups"""
+        key = self.normalize_ign(ign)
+        if not key:
+            return
+        ts = time.time() if timestamp is None else timestamp
+        bin_value = parse_price(bin_price) if bin_price else None
+        co_value = parse_price(co) if co else None
+        if bin_value is None and co_value is None:
+            return
+        bin_value = math.nan if bin_value is None else bin_value
+        co_value = math.nan if co_value is None else co_value
+        
+        raw_ign = key.encode("utf-8")[:self.IGN_BYTES]
+        record = self.RECORD.pack(ts, raw_ign, bin_value, co_value)
+        with open(self.path, 'ab') as f:
+            f.write(record)
+            self.offset = f.tell()
+        self.last_record = record
+        self.dirty = True
+        self._apply(raw_ign.decode("utf-8", "ignore"), ts, bin_value, co_value)
+
+    def _apply(self, ign: str, ts: float, bin_value: float, co_value: float):
+        self._fold(self.hourly.setdefault(ign, {}), int(ts // 3600) * 3600,
+                   bin_value, co_value, PRICE_HISTORY_HOURLY_BUCKETS)
+        self._fold(self.daily.setdefault(ign, {}), int(ts // 86400) * 86400,
+                   bin_value, co_value, PRICE_HISTORY_DAILY_BUCKETS)
+
+    @staticmethod
+    def _fold(buckets: Dict[int, List[Optional[float]]], start: int,
+              bin_value: float, co_value: float, limit: int):
+        # Bucket layout: [bin_min, bin_max, bin_last, co_min, co_max, co_last]
+        bucket = buckets.get(start)
+        if bucket is None:
+            bucket = buckets[start] = [None] * 6
+            while len(buckets) > limit:
+                del buckets[min(buckets)]
+        for base, value in ((0, bin_value), (3, co_value)):
+            if math.isnan(value):
+                continue
+            low, high = bucket[base], bucket[base + 1]
+            bucket[base] = value if low is None else min(low, value)
+            bucket[base + 1] = value if high is None else max(high, value)
+            bucket[base + 2] = value
+
+    def query(self, ign: str, resolution: str = "daily", limit: int = 14) -> List[Tuple[int, List[Optional[float]]]]:
+        """Return the most recent rollup buckets for an account, oldest first"""
+        rollups = self.hourly if resolution == "hourly" else self.daily
+        buckets = rollups.get(self.normalize_ign(ign), {})
+        return sorted(buckets.items())[-limit:]
+
+price_history = PriceHistoryStore(PRICE_HISTORY_FILE)
+
+# =================== LISTING ARCHIVE ===================
+class ListingArchive:
+    """Append-only archive of sold and expired listings.
+    
+    Records are partitioned by the UTC month they closed in. Each month is a
+    gzip JSONL segment (one gzip member per sealed batch) with a small JSON
+    index of seller and guild counts, so history queries only open the
+    segments that can contain matches and monthly stats never open any.
+    
+    Each record is appended to the month's plain JSONL staging file as it is
+    archived, so nothing waits in memory; sealing compresses a whole staging
+    file into the segment. Staging files are named by the segment size their
+    batch starts at, which lets load roll back a seal that was interrupted.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.indexes: Dict[str, Dict] = {}
+        # Staged (not yet sealed) records and their staging file, per month
+        self.buffer: Dict[str, List[Dict]] = {}
+        self.staging: Dict[str, str] = {}
+        self.load()
+    
+    def segment_path(self, month: str) -> str:
+        return os.path.join(self.directory, f"{month}.jsonl.gz")
+    
+    def index_path(self, month: str) -> str:
+        return os.path.join(self.directory, f"{month}.idx.json")
+    
+    @staticmethod
+    def partition(timestamp: float) -> str:
+        return datetime.utcfromtimestamp(timestamp).strftime("%Y-%m")
+    
+    @staticmethod
+    def new_index() -> Dict:
+        # guilds: guild_id -> [sold, sold_volume, expired]
+        return {"records": 0, "bytes": 0, "first": None, "last": None, "sellers": {}, "guilds": {}}
+    
+    def load(self):
+        if not os.path.isdir(self.directory):
+            return
+        names = os.listdir(self.directory)
+        staged: Dict[str, Tuple[int, str]] = {}
+        for name in names:
+            if name.endswith(".staged.jsonl"):
+                month, offset = name[:-len(".staged.jsonl")].split(".")
+                staged[month] = (int(offset), os.path.join(self.directory, name))
+        
+        for name in names:
+            if not name.endswith(".jsonl.gz"):
+                continue
+            month = name[:-len(".jsonl.gz")]
+            try:
+                with open(self.index_path(month), 'r') as f:
+                    index = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                index = None
+            if month in staged:
+                # A staging file only outlives its seal if the seal was interrupted: roll it back
+                offset = staged[month][0]
+                if os.path.getsize(self.segment_path(month)) > offset:
+                    with open(self.segment_path(month), 'r+b') as f:
+                        f.truncate(offset)
+                if index is not None and index["bytes"] != offset:
+                    index = None
+            self.indexes[month] = self.recover(month, index)
+        
+        for month, (_, path) in staged.items():
+            index = self.indexes.setdefault(month, self.new_index())
+            self.staging[month] = path
+            self.buffer[month] = self.read_staging(path)
+            for record in self.buffer[month]:
+                self._index_record(index, record)
+    
+    def recover(self, month: str, index: Optional[Dict]) -> Dict:
+        """Reconcile a segment with its index after an interrupted seal"""
+        path = self.segment_path(month)
+        size = os.path.getsize(path)
+        if index is not None and index["bytes"] == size:
+            return index
+        
+        if index is None or index["bytes"] > size:
+            index, start = self.new_index(), 0
+        else:
+            # The last batch was appended but its index was not written
+            start = index["bytes"]
+        records, end = self.scan_members(path, start)
+        if end < size:
+            # Torn batch: drop it so later appends stay readable
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+        
+        for record in records:
+            self._index_record(index, record)
+        index["bytes"] = end
+        self.indexes[month] = index
+        self.write_index(month)
+        return index
+    
+    @staticmethod
+    def scan_members(path: str, start: int) -> Tuple[List[Dict], int]:
+        """Decode whole gzip members from start; return their records and the offset after the last good one"""
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read()
+        records, offset = [], 0
+        while offset < len(data):
+            decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                payload = decoder.decompress(data[offset:])
+                if not decoder.eof:
+                    break
+                batch = [json.loads(line) for line in payload.decode("utf-8").splitlines()]
+            except (zlib.error, ValueError):
+                break
+            records.extend(batch)
+            offset = len(data) - len(decoder.unused_data)
+        return records, start + offset
+    
+    @staticmethod
+    def read_staging(path: str) -> List[Dict]:
+        """Records of a staging file, dropping a torn last line"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        records, good = [], 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            good += len(line)
+        if good < len(data):
+            with open(path, 'r+b') as f:
+                f.truncate(good)
+        return records
+    
+    def _index_record(self, index: Dict, record: Dict):
+        closed_at = record["closed_at"]
+        index["records"] += 1
+        index["first"] = closed_at if index["first"] is None else min(index["first"], closed_at)
+        index["last"] = closed_at if index["last"] is None else max(index["last"], closed_at)
+        totals = index["guilds"].setdefault(str(record.get("guild_id")), [0, 0.0, 0])
+        if record["status"] == "sold":
+            seller = str(record.get("seller_id"))
+            index["sellers"][seller] = index["sellers"].get(seller, 0) + 1
+            totals[0] += 1
+            totals[1] += parse_price(record.get("bin_price") or "") or 0.0
+        else:
+            totals[2] += 1
+    
+    def append(self, listing_id: str, listing: Dict, status: str, timestamp: Optional[float] = None):
+        """Archive a listing that left the hot store ("sold" or "expired")"""
+        closed_at = time.time() if timestamp is None else timestamp
+        record = {**listing, "listing_id": listing_id, "status": status, "closed_at": closed_at}
+        month = self.partition(closed_at)
+        for older in [staged for staged in self.staging if staged < month]:
+            self.seal(older)
+        
+        index = self.indexes.setdefault(month, self.new_index())
+        if month not in self.staging:
+            os.makedirs(self.directory, exist_ok=True)
+            self.staging[month] = os.path.join(self.directory, f"{month}.{index['bytes']}.staged.jsonl")
+        with open(self.staging[month], 'a') as f:
+            f.write(json.dumps(record) + "\n")
+        self.buffer.setdefault(month, []).append(record)
+        self._index_record(index, record)
+        if len(self.buffer[month]) >= ARCHIVE_SEAL_RECORDS:
+            self.seal(month)
+    
+    def write_index(self, month: str):
+        temp_path = self.index_path(month) + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.indexes[month], f)
+        os.replace(temp_path, self.index_path(month))
+    
+    def seal(self, month: str):
+        """Compress a month's staged records into one gzip member of its segment"""
+        records = self.buffer.pop(month, [])
+        path = self.staging.pop(month)
+        if records:
+            payload = "".join(json.dumps(record) + "\n" for record in records)
+            with open(self.segment_path(month), 'ab') as f:
+                f.write(gzip.compress(payload.encode("utf-8")))
+                self.indexes[month]["bytes"] = f.tell()
+            self.write_index(month)
+        os.remove(path)
+    
+    def read_segment(self, month: str):
+        """Records of one month, sealed first and then still-staged"""
+        try:
+            with gzip.open(self.segment_path(month), 'rt', encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+        except FileNotFoundError:
+            pass
+        except (EOFError, gzip.BadGzipFile):
+            # Torn trailing batch; everything before it is intact
+            pass
+        yield from self.buffer.get(month, [])
+    
+    def seller_sales(self, seller_id: int, limit: int = 10) -> List[Dict]:
+        """Most recent sales by a seller, opening only segments whose index lists them"""
+        key = str(seller_id)
+        sales = []
+        for month in sorted(self.indexes, reverse=True):
+            if key not in self.indexes[month]["sellers"]:
+                continue
+            sales.extend(
+                record for record in self.read_segment(month)
+                if record["status"] == "sold" and str(record.get("seller_id")) == key
+            )
+            if len(sales) >= limit:
+                break
+        sales.sort(key=lambda record: record["closed_at"], reverse=True)
+        return sales[:limit]
+    
+    def guild_monthly(self, guild_id: int, months: int = 12) -> List[Tuple[str, int, float, int]]:
+        """(month, sold, sold_volume, expired) for a guild, newest first, from the indexes alone"""
+        key = str(guild_id)
+        rows = []
+        for month in sorted(self.indexes, reverse=True):
+            totals = self.indexes[month]["guilds"].get(key)
+            if totals:
+                rows.append((month, *totals))
+            if len(rows) >= months:
+                break
+        return rows
+
+archive = ListingArchive(ARCHIVE_DIR)
+
+# =================== WATCHLISTS ===================
+class PriceBucket:
+    """Subscription ids kept sorted by descending price ceiling"""
+    __slots__ = ("neg_prices", "ids")
+    
+    def __init__(self):
+        self.neg_prices: List[float] = []
+        self.ids: List[str] = []
+    
+    def add(self, max_price: float, sub_id: str):
+        index = bisect.bisect_right(self.neg_prices, -max_price)
+        self.neg_prices.insert(index, -max_price)
+        self.ids.insert(index, sub_id)
+    
+    def remove(self, max_price: float, sub_id: str):
+        index = bisect.bisect_left(self.neg_prices, -max_price)
+        while index < len(self.ids) and self.neg_prices[index] == -max_price:
+            if self.ids[index] == sub_id:
+                del self.neg_prices[index]
+                del self.ids[index]
+                return
+            index += 1
+    
+    def matching(self, price: float) -> List[str]:
+        return self.ids[:bisect.bisect_right(self.neg_prices, -price)]
+
+class RangeIndex:
+    """Segment tree over levels whose nodes hold PriceBucket lists.
+
+    A subscription for levels [low, high] is stored on the O(log n) nodes that
+    cover the range. Matching a listing walks one leaf-to-root path and bisects
+    each bucket by price, so the cost follows the number of matches rather than
+    the number of subscriptions.
+    """
+    def __init__(self, size_bits: int):
+        self.size = 1 << size_bits
+        self.nodes: Dict[int, PriceBucket] = {}
+    
+    def clamp(self, level: int) -> int:
+        return max(0, min(self.size - 1, level))
+    
+    def cover(self, low: int, high: int) -> List[int]:
+        nodes = []
+        low, high = self.clamp(low) + self.size, self.clamp(high) + self.size + 1
+        while low < high:
+            if low & 1:
+                nodes.append(low)
+                low += 1
+            if high & 1:
+                high -= 1
+                nodes.append(high)
+            low >>= 1
+            high >>= 1
+        return nodes
+    
+    def add(self, low: int, high: int, max_price: float, sub_id: str):
+        for node in self.cover(low, high):
+            bucket = self.nodes.get(node)
+            if bucket is None:
+                bucket = self.nodes[node] = PriceBucket()
+            bucket.add(max_price, sub_id)
+    
+    def remove(self, low: int, high: int, max_price: float, sub_id: str):
+        for node in self.cover(low, high):
+            bucket = self.nodes.get(node)
+            if bucket is not None:
+                bucket.remove(max_price, sub_id)
+                if not bucket.ids:
+                    del self.nodes[node]
+    
+    def query(self, level: int, price: float) -> List[str]:
+        matches = []
+        node = self.clamp(level) + self.size
+        while node:
+            bucket = self.nodes.get(node)
+            if bucket is not None:
+                matches.extend(bucket.matching(price))
+            node >>= 1
+        return matches
+
+class WatchlistManager:
+    """Buyer subscriptions indexed per (guild, game), with alerts batched per user"""
+    # Level domain per game; duels levels are indexes into DUELS_TITLES
+    LEVEL_BITS = {"bedwars": 13, "skywars": 8, "duels": 4}
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.subscriptions: Dict[str, Dict] = {}
+        self.by_user: Dict[int, List[str]] = {}
+        self.indexes: Dict[Tuple[int, str], RangeIndex] = {}
+        # user_id -> queued listing ids (a set would lose arrival order)
+        self.pending: Dict[int, Dict[str, None]] = {}
+        self.next_id = 1
+        self.dirty = False
+        self.load()
+    
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.next_id = stored.get("next_id", 1)
+        for sub in stored.get("subscriptions", []):
+            self.index(sub)
+    
+    def flush(self):
+        if not self.dirty:
+            return
+        with open(self.path, 'w') as f:
+            json.dump({"next_id": self.next_id, "subscriptions": list(self.subscriptions.values())}, f)
+        self.dirty = False
+    
+    @staticmethod
+    def bounds(sub: Dict) -> Tuple[int, int, float]:
+        high = sub["max_level"] if sub.get("max_level") is not None else 1 << 30
+        max_price = sub["max_price"] if sub.get("max_price") is not None else math.inf
+        return sub["min_level"], high, max_price
+    
+    def index(self, sub: Dict):
+        self.subscriptions[sub["id"]] = sub
+        self.by_user.setdefault(sub["user_id"], []).append(sub["id"])
+        key = (sub["guild_id"], sub["game"])
+        if key not in self.indexes:
+            self.indexes[key] = RangeIndex(self.LEVEL_BITS[sub["game"]])
+        self.indexes[key].add(*self.bounds(sub), sub["id"])
+    
+    def subscribe(self, user_id: int, guild_id: int, game: str, min_level: int,
+                  max_level: Optional[int], max_price: Optional[float]) -> Dict:
+        sub = {
+            "id": str(self.next_id),
+            "user_id": user_id,
+            "guild_id": guild_id,
+            "game": game,
+            "min_level": min_level,
+            "max_level": max_level,
+            "max_price": max_price
+        }
+        self.next_id += 1
+        self.index(sub)
+        self.dirty = True
+        return sub
+    
+    def unsubscribe(self, user_id: int, sub_id: str) -> bool:
+        sub = self.subscriptions.get(sub_id)
+        if sub is None or sub["user_id"] != user_id:
+            return False
+        del self.subscriptions[sub_id]
+        self.by_user[user_id].remove(sub_id)
+        if not self.by_user[user_id]:
+            del self.by_user[user_id]
+        index = self.indexes[(sub["guild_id"], sub["game"])]
+        index.remove(*self.bounds(sub), sub_id)
+        self.dirty = True
+        return True
+    
+    def user_subscriptions(self, user_id: int) -> List[Dict]:
+        return [self.subscriptions[sub_id] for sub_id in self.by_user.get(user_id, [])]
+    
+    @staticmethod
+    def listing_levels(listing: Dict) -> Dict[str, int]:
+        stats = listing.get("stats", {})
+        levels = {}
+        if stats.get("bedwars", {}).get("level", 0) > 0:
+            levels["bedwars"] = stats["bedwars"]["level"]
+        if stats.get("skywars", {}).get("level", 0) > 0:
+            levels["skywars"] = stats["skywars"]["level"]
+        title = stats.get("duels", {}).get("title")
+        titles = [t[0] for t in DUELS_TITLES]
+        if title in titles:
+            levels["duels"] = titles.index(title)
+        return levels
+    
+    def match(self, listing: Dict, bin_price: Optional[str] = None) -> set:
+        """Subscription ids matching a listing (optionally at a different BIN price)"""
+        price = parse_price(bin_price if bin_price is not None else listing.get("bin_price"))
+        # Listings without a BIN only match subscriptions without a price ceiling
+        price = math.inf if price is None else price
+        guilds = {listing.get("guild_id")} | {mirror["guild_id"] for mirror in listing.get("mirrors", [])}
+        
+        matches = set()
+        for game, level in self.listing_levels(listing).items():
+            for guild_id in guilds:
+                index = self.indexes.get((guild_id, game))
+                if index is not None:
+                    matches.update(index.query(level, price))
+        return matches
+    
+    def notify(self, listing_id: str, listing: Dict, previous_bin: Optional[str] = None):
+        """Queue alerts for subscriptions a new or repriced listing now matches"""
+        matches = self.match(listing)
+        if previous_bin is not None:
+            # Only alert subscriptions that did not already match at the old price
+            matches -= self.match(listing, previous_bin)
+        
+        for sub_id in matches:
+            sub = self.subscriptions[sub_id]
+            if sub["user_id"] == listing.get("seller_id"):
+                continue
+            pending = self.pending.setdefault(sub["user_id"], {})
+            if len(pending) < WATCH_PENDING_PER_USER:
+                pending[listing_id] = None
+    
+    async def flush_alerts(self, client: discord.Client):
+        """Send each user one DM summarizing their queued matches"""
+        batches, self.pending = self.pending, {}
+        limit = asyncio.Semaphore(FANOUT_WORKERS)
+        
+        async def send(user_id: int, listing_ids: Dict[str, None]):
+            # Alerts are sent up to a minute after matching: skip listings that closed since, use current prices
+            matches = {
+                listing_id: data_manager.listings[listing_id]
+                for listing_id in listing_ids if listing_id in data_manager.listings
+            }
+            if not matches:
+                return
+            async with limit:
+                try:
+                    user = client.get_user(user_id) or await client.fetch_user(user_id)
+                    await user.send(embed=self.alert_embed(matches))
+                except discord.HTTPException:
+                    pass
+        
+        await asyncio.gather(*(send(user_id, listing_ids) for user_id, listing_ids in batches.items()))
+    
+    @staticmethod
+    def alert_embed(matches: Dict[str, Dict]) -> discord.Embed:
+        embed = discord.Embed(
+            title="Watchlist Matches",
+            description=f"{len(matches)} new listing(s) match your watchlist",
+            color=0x5865F2
+        )
+        for listing_id, listing in itertools.islice(matches.items(), WATCH_ALERTS_PER_DM):
+            embed.add_field(
+                name=listing.get("ign", "Unknown"),
+                value=f"**BIN:** {listing.get('bin_price') or 'Not Set'}\n"
+                      f"[Jump to listing](https://discord.com/channels/{listing.get('guild_id')}/{listing.get('channel_id')}/{listing_id})",
+                inline=True
+            )
+        if len(matches) > WATCH_ALERTS_PER_DM:
+            embed.set_footer(text=f"…and {len(matches) - WATCH_ALERTS_PER_DM} more")
+        return embed
+
+watchlists = WatchlistManager(WATCHLIST_FILE)
+
+# =================== LISTING DRAFTS ===================
+def blank_listing_data(seller_id: int, ign: str, bin_price: Optional[str],
+                       co: Optional[str], notes: Optional[str]) -> Dict:
+    """Listing data with default stats and colors, as edited by StatSelectionView"""
+    return {
+        "ign": ign,
+        "seller_id": seller_id,
+        "bin_price": bin_price,
+        "co": co,
+        "notes": notes,
+        "stats": {
+            "general": {"rank": "None", "network_level": 1},
+            "bedwars": {"level": 0, "fkdr": 0.0, "wins": 0},
+            "skywars": {"level": 0, "kdr": 0.0, "wins": 0},
+            "duels": {"title": None, "wins": 0, "kdr": 0.0}
+        },
+        "custom_colors": {
+            "embed_color": 0x5865F2,
+            "bedwars_color": None,
+            "skywars_color": None,
+            "duels_color": None
+        }
+    }
+
+class DraftStore:
+    """In-progress listings keyed by user and guild, bounded by an LRU cap and idle eviction.
+
+    Views only carry a draft key; all draft state lives here and is
+    optionally flushed to disk so a restart does not lose anyone's work.
+    """
+    def __init__(self, path: Optional[str], max_entries: int, idle_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.idle_seconds = idle_seconds
+        self.drafts: "OrderedDict[str, Dict]" = OrderedDict()
+        self.dirty = False
+        self.load()
+    
+    @staticmethod
+    def key_for(user_id: int, guild_id: Optional[int]) -> str:
+        return f"{user_id}:{guild_id}"
+    
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for key, draft in sorted(stored.items(), key=lambda item: item[1].get("updated_at", 0)):
+            self.drafts[key] = draft
+        self.evict()
+    
+    def flush(self):
+        if not self.path or not self.dirty:
+            return
+        with open(self.path, 'w') as f:
+            json.dump(self.drafts, f)
+        self.dirty = False
+    
+    def evict(self):
+        cutoff = time.time() - self.idle_seconds
+        while self.drafts:
+            key, draft = next(iter(self.drafts.items()))
+            if len(self.drafts) <= self.max_entries and draft.get("updated_at", 0) >= cutoff:
+                break
+            del self.drafts[key]
+            self.dirty = True
+    
+    def create(self, user_id: int, guild_id: Optional[int], ign: str,
+               bin_price: Optional[str], co: Optional[str], notes: Optional[str]) -> str:
+        key = self.key_for(user_id, guild_id)
+        self.drafts.pop(key, None)
+        self.drafts[key] = {**blank_listing_data(user_id, ign, bin_price, co, notes), "updated_at": time.time()}
+        self.dirty = True
+        self.evict()
+        return key
+    
+    def get(self, key: str) -> Optional[Dict]:
+        self.evict()
+        draft = self.drafts.get(key)
+        if draft is not None:
+            self.drafts.move_to_end(key)
+        return draft
+    
+    def touch(self, key: str):
+        """Mark a draft as modified after its contents were changed in place"""
+        draft = self.drafts.get(key)
+        if draft is not None:
+            draft["updated_at"] = time.time()
+            self.drafts.move_to_end(key)
+            self.dirty = True
+    
+    def discard(self, key: str):
+        if self.drafts.pop(key, None) is not None:
+            self.dirty = True
+
+draft_store = DraftStore(DRAFTS_FILE, DRAFT_MAX_ENTRIES, DRAFT_IDLE_SECONDS)
+
 # =================== EMBED BUILDER ===================
 class EmbedBuilder:
     @staticmethod
@@ -219,7 +1906,7 @@ class EmbedBuilder:
         
         # BedWars stats
         bedwars = stats.get("bedwars", {})
-        if bedwars.get("level", 0) > 0:
+        if guild_settings.get("enable_bedwars", True) and bedwars.get("level", 0) > 0:
             star_icon, star_color, star_name = EmbedBuilder.get_bedwars_star_display(bedwars["level"])
             
             # Use custom color if provided
@@ -241,7 +1928,7 @@ class EmbedBuilder:
         
         # SkyWars stats
         skywars = stats.get("skywars", {})
-        if skywars.get("level", 0) > 0:
+        if guild_settings.get("enable_skywars", True) and skywars.get("level", 0) > 0:
             star_icon, star_color, star_name = EmbedBuilder.get_skywars_star_display(skywars["level"])
             
             # Use custom color if provided
@@ -263,7 +1950,7 @@ class EmbedBuilder:
         
         # Duels stats
         duels = stats.get("duels", {})
-        if duels.get("title"):
+        if guild_settings.get("enable_duels", True) and duels.get("title"):
             # Find title data
             title_data = next((t for t in DUELS_TITLES if t[0] == duels["title"]), DUELS_TITLES[0])
             title_name, title_color, title_icon = title_data
@@ -300,82 +1987,115 @@ class EmbedBuilder:
 
 # =================== CUSTOM STAT SELECTION UI ===================
 class StatSelectionView(View):
-    def __init__(self, ign: str, seller: discord.User, bin_price: str = None, co: str = None, notes: str = None):
+    def __init__(self, draft_key: str):
         super().__init__(timeout=300)
-        self.ign = ign
-        self.seller = seller
-        self.bin_price = bin_price
-        self.co = co
-        self.notes = notes
-        
-        # Default stats
-        self.stats = {
-            "general": {"rank": "None", "network_level": 1},
-            "bedwars": {"level": 0, "fkdr": 0.0, "wins": 0},
-            "skywars": {"level": 0, "kdr": 0.0, "wins": 0},
-            "duels": {"title": None, "wins": 0, "kdr": 0.0}
-        }
+        self.draft_key = draft_key
+    
+    @staticmethod
+    def instructions_embed(ign: str, resumed: bool = False) -> discord.Embed:
+        description = "Set up your account stats using the buttons below. Click each section to customize it."
+        if resumed:
+            description = "Resuming your saved draft. " + description
         
-        # Custom colors
-        self.custom_colors = {
-            "embed_color": 0x5865F2,
-            "bedwars_color": None,
-            "skywars_color": None,
-            "duels_color": None
-        }
+        embed = discord.Embed(
+            title=f"Customize Stats for {ign}",
+            description=description,
+            color=0x5865F2
+        )
+        
+        embed.add_field(
+            name="Instructions",
+            value="• **General Stats**: Set rank and network level\n"
+                  "• **BedWars/SkyWars**: Set star levels and ratios\n"
+                  "• **Duels**: Choose title and set wins\n"
+                  "• **Colors**: Customize embed and section colors\n"
+                  "• **Preview**: View and post your listing",
+            inline=False
+        )
+        return embed
+    
+    async def load_draft(self, interaction: discord.Interaction) -> Optional[Dict]:
+        draft = draft_store.get(self.draft_key)
+        if draft is None:
+            await interaction.response.send_message("This draft has expired. Use `/list` to start again.", ephemeral=True)
+        return draft
     
     @discord.ui.button(label="Set General Stats", style=discord.ButtonStyle.primary, emoji="📊")
     async def set_general(self, interaction: discord.Interaction, button: Button):
-        modal = GeneralStatsModal(self.stats["general"])
+        draft = await self.load_draft(interaction)
+        if draft is None:
+            return
+        modal = GeneralStatsModal(draft["stats"]["general"])
         modal.view = self
         await interaction.response.send_modal(modal)
     
     @discord.ui.button(label="Set BedWars", style=discord.ButtonStyle.primary, emoji="🛏️")
     async def set_bedwars(self, interaction: discord.Interaction, button: Button):
-        modal = BedWarsStatsModal(self.stats["bedwars"])
+        draft = await self.load_draft(interaction)
+        if draft is None:
+            return
+        modal = BedWarsStatsModal(draft["stats"]["bedwars"])
         modal.view = self
         await interaction.response.send_modal(modal)
     
     @discord.ui.button(label="Set SkyWars", style=discord.ButtonStyle.primary, emoji="⚔️")
     async def set_skywars(self, interaction: discord.Interaction, button: Button):
-        modal = SkyWarsStatsModal(self.stats["skywars"])
+        draft = await self.load_draft(interaction)
+        if draft is None:
+            return
+        modal = SkyWarsStatsModal(draft["stats"]["skywars"])
         modal.view = self
         await interaction.response.send_modal(modal)
     
     @discord.ui.button(label="Set Duels", style=discord.ButtonStyle.primary, emoji="🗡️")
     async def set_duels(self, interaction: discord.Interaction, button: Button):
-        view = DuelsSelectionView(self.stats["duels"], self)
+        draft = await self.load_draft(interaction)
+        if draft is None:
+            return
+        view = DuelsSelectionView(draft["stats"]["duels"], self)
         embed = discord.Embed(title="Select Duels Title", color=0x5865F2)
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
     
     @discord.ui.button(label="Customize Colors", style=discord.ButtonStyle.secondary, emoji="🎨")
     async def customize_colors(self, interaction: discord.Interaction, button: Button):
-        modal = ColorCustomizationModal(self.custom_colors)
+        draft = await self.load_draft(interaction)
+        if draft is None:
+            return
+        modal = ColorCustomizationModal(draft["custom_colors"])
         modal.view = self
         await interaction.response.send_modal(modal)
     
     @discord.ui.button(label="Preview & Post", style=discord.ButtonStyle.success, emoji="👁️")
     async def preview_listing(self, interaction: discord.Interaction, button: Button):
+        draft = await self.load_draft(interaction)
+        if draft is None:
+            return
         guild_settings = data_manager.get_guild_settings(interaction.guild_id)
         
         embed = EmbedBuilder.create_listing_embed(
-            self.ign, self.seller, self.stats,
-            self.bin_price, self.co, self.notes,
-            guild_settings, self.custom_colors
+            draft["ign"], interaction.user, draft["stats"],
+            draft["bin_price"], draft["co"], draft["notes"],
+            guild_settings, draft["custom_colors"]
         )
         
         view = ListingConfirmView(embed, interaction.channel_id, {
-            "ign": self.ign,
-            "seller_id": self.seller.id,
-            "bin_price": self.bin_price,
-            "co": self.co,
-            "notes": self.notes,
-            "stats": self.stats,
-            "custom_colors": self.custom_colors,
+            "ign": draft["ign"],
+            "seller_id": interaction.user.id,
+            "bin_price": draft["bin_price"],
+            "co": draft["co"],
+            "notes": draft["notes"],
+            "stats": json.loads(json.dumps(draft["stats"])),
+            "custom_colors": dict(draft["custom_colors"]),
             "created_at": datetime.utcnow().isoformat()
-        })
+        }, draft_key=self.draft_key)
         
         await interaction.response.send_message("Preview your listing:", embed=embed, view=view, ephemeral=True)
+    
+    @discord.ui.button(label="Discard Draft", style=discord.ButtonStyle.danger, emoji="🗑️")
+    async def discard_draft(self, interaction: discord.Interaction, button: Button):
+        draft_store.discard(self.draft_key)
+        await interaction.response.send_message("Draft discarded. Use `/list` to start a new listing.", ephemeral=True)
+        self.stop()
 
 class GeneralStatsModal(Modal, title="Set General Stats"):
     rank = TextInput(label="Rank (e.g., MVP+, VIP)", placeholder="None", required=False, max_length=10)
@@ -389,10 +2109,14 @@ class GeneralStatsModal(Modal, title="Set General Stats"):
     async def on_submit(self, interaction: discord.Interaction):
         try:
             level = int(self.network_level.value) if self.network_level.value.isdigit() else 1
-            self.view.stats["general"] = {
+            draft = await self.view.load_draft(interaction)
+            if draft is None:
+                return
+            draft["stats"]["general"] = {
                 "rank": self.rank.value or "None",
                 "network_level": level
             }
+            draft_store.touch(self.view.draft_key)
             await interaction.response.send_message("✅ General stats updated!", ephemeral=True)
         except ValueError:
             await interaction.response.send_message("❌ Invalid network level!", ephemeral=True)
@@ -414,11 +2138,15 @@ class BedWarsStatsModal(Modal, title="Set BedWars Stats"):
             fkdr = float(self.fkdr.value) if self.fkdr.value else 0.0
             wins = int(self.wins.value) if self.wins.value.isdigit() else 0
             
-            self.view.stats["bedwars"] = {
+            draft = await self.view.load_draft(interaction)
+            if draft is None:
+                return
+            draft["stats"]["bedwars"] = {
                 "level": level,
                 "fkdr": fkdr,
                 "wins": wins
             }
+            draft_store.touch(self.view.draft_key)
             await interaction.response.send_message("✅ BedWars stats updated!", ephemeral=True)
         except ValueError:
             await interaction.response.send_message("❌ Invalid stats format!", ephemeral=True)
@@ -440,11 +2168,15 @@ class SkyWarsStatsModal(Modal, title="Set SkyWars Stats"):
             kdr = float(self.kdr.value) if self.kdr.value else 0.0
             wins = int(self.wins.value) if self.wins.value.isdigit() else 0
             
-            self.view.stats["skywars"] = {
+            draft = await self.view.load_draft(interaction)
+            if draft is None:
+                return
+            draft["stats"]["skywars"] = {
                 "level": level,
                 "kdr": kdr,
                 "wins": wins
             }
+            draft_store.touch(self.view.draft_key)
             await interaction.response.send_message("✅ SkyWars stats updated!", ephemeral=True)
         except ValueError:
             await interaction.response.send_message("❌ Invalid stats format!", ephemeral=True)
@@ -486,11 +2218,15 @@ class DuelsStatsModal(Modal, title="Set Duels Stats"):
             wins = int(self.wins.value) if self.wins.value.isdigit() else 0
             kdr = float(self.kdr.value) if self.kdr.value else 0.0
             
-            self.parent_view.stats["duels"] = {
+            draft = await self.parent_view.load_draft(interaction)
+            if draft is None:
+                return
+            draft["stats"]["duels"] = {
                 "title": self.selected_title,
                 "wins": wins,
                 "kdr": kdr
             }
+            draft_store.touch(self.parent_view.draft_key)
             await interaction.response.send_message(f"✅ Duels stats updated! Title: {self.selected_title}", ephemeral=True)
         except ValueError:
             await interaction.response.send_message("❌ Invalid stats format!", ephemeral=True)
@@ -508,21 +2244,28 @@ class ColorCustomizationModal(Modal, title="Customize Colors"):
     
     async def on_submit(self, interaction: discord.Interaction):
         try:
+            colors = {}
             if self.embed_color.value:
                 color_str = self.embed_color.value.lstrip('#')
-                self.view.custom_colors["embed_color"] = int(color_str, 16)
+                colors["embed_color"] = int(color_str, 16)
             
             if self.bedwars_color.value:
                 color_str = self.bedwars_color.value.lstrip('#')
-                self.view.custom_colors["bedwars_color"] = int(color_str, 16)
+                colors["bedwars_color"] = int(color_str, 16)
             
             if self.skywars_color.value:
                 color_str = self.skywars_color.value.lstrip('#')
-                self.view.custom_colors["skywars_color"] = int(color_str, 16)
+                colors["skywars_color"] = int(color_str, 16)
             
             if self.duels_color.value:
                 color_str = self.duels_color.value.lstrip('#')
-                self.view.custom_colors["duels_color"] = int(color_str, 16)
+                colors["duels_color"] = int(color_str, 16)
+            
+            draft = await self.view.load_draft(interaction)
+            if draft is None:
+                return
+            draft["custom_colors"].update(colors)
+            draft_store.touch(self.view.draft_key)
             
             await interaction.response.send_message("✅ Colors updated!", ephemeral=True)
         except ValueError:
@@ -549,59 +2292,81 @@ class ListingModal(Modal, title="Create Account Listing"):
     
     async def on_submit(self, interaction: discord.Interaction):
         # Show stat selection interface
-        view = StatSelectionView(
-            self.ign.value, 
-            interaction.user, 
+        draft_key = draft_store.create(
+            interaction.user.id,
+            interaction.guild_id,
+            self.ign.value,
             self.bin_price.value or None,
-            self.co.value or None, 
+            self.co.value or None,
             self.notes.value or None
         )
-        
-        embed = discord.Embed(
-            title=f"Customize Stats for {self.ign.value}",
-            description="Set up your account stats using the buttons below. Click each section to customize it.",
-            color=0x5865F2
-        )
-        
-        embed.add_field(
-            name="Instructions",
-            value="• **General Stats**: Set rank and network level\n"
-                  "• **BedWars/SkyWars**: Set star levels and ratios\n"
-                  "• **Duels**: Choose title and set wins\n"
-                  "• **Colors**: Customize embed and section colors\n"
-                  "• **Preview**: View and post your listing",
-            inline=False
-        )
+        view = StatSelectionView(draft_key)
+        embed = StatSelectionView.instructions_embed(self.ign.value)
         
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
 # =================== REST OF THE COMPONENTS (UNCHANGED) ===================
 class ListingConfirmView(View):
-    def __init__(self, embed: discord.Embed, channel_id: int, listing_data: Dict):
+    def __init__(self, embed: discord.Embed, channel_id: int, listing_data: Dict, draft_key: Optional[str] = None):
         super().__init__(timeout=300)
         self.embed = embed
         self.channel_id = channel_id
         self.listing_data = listing_data
+        self.draft_key = draft_key
     
     @discord.ui.button(label="Post Listing", style=discord.ButtonStyle.success, emoji="📤")
     async def post_listing(self, interaction: discord.Interaction, button: Button):
-        channel = interaction.client.get_channel(self.channel_id)
+        guild_settings = data_manager.get_guild_settings(interaction.guild_id)
+        channel_id = guild_settings.get("listing_channel") or guild_settings.get("default_channel_id") or self.channel_id
+        channel = interaction.client.get_channel(int(channel_id))
         if not channel:
             await interaction.response.send_message("Channel not found!", ephemeral=True)
             return
         
-        message = await channel.send(embed=self.embed, view=ListingManageView(self.listing_data))
+        if await reject_if_limited(interaction, "post"):
+            return
         
-        listing_id = str(message.id)
-        data_manager.listings[listing_id] = {
-            **self.listing_data,
-            "message_id": message.id,
-            "channel_id": channel.id,
-            "guild_id": interaction.guild_id
-        }
-        data_manager.save_listings()
+        # Check and reserve without awaiting in between so concurrent posts of the same account see each other
+        existing, in_flight = data_manager.ign_index.lookup(self.listing_data)
+        policy = guild_settings.get("duplicate_policy", "warn")
+        if (existing or in_flight) and policy == "block":
+            await interaction.response.send_message(
+                f"❌ **{self.listing_data['ign']}** is already listed. This server does not allow duplicate listings.",
+                ephemeral=True
+            )
+            return
+        
+        if await reject_if_busy(interaction):
+            return
         
-        await interaction.response.send_message("✅ Listing posted successfully!", ephemeral=True)
+        reserved = data_manager.ign_index.reserve(self.listing_data)
+        # Released around the whole responder: deferring can itself fail (e.g. an expired interaction)
+        try:
+            async with InteractionResponder(interaction, "post", slow=True) as responder:
+                message = await channel.send(embed=self.embed, view=ListingManageView(self.listing_data))
+                
+                listing_id = str(message.id)
+                listing = {
+                    **self.listing_data,
+                    "message_id": message.id,
+                    "channel_id": channel.id,
+                    "guild_id": interaction.guild_id
+                }
+                data_manager.add_listing(listing_id, listing)
+                data_manager.save_listings()
+                fanout.post(interaction.client, listing_id, listing, self.embed, exclude=channel.id)
+                if self.draft_key:
+                    draft_store.discard(self.draft_key)
+                price_history.record(self.listing_data["ign"], self.listing_data.get("bin_price"), self.listing_data.get("co"))
+                watchlists.notify(listing_id, listing)
+                
+                content = "✅ Listing posted successfully!"
+                if (existing or in_flight) and policy == "warn":
+                    content += f"\n⚠️ **{self.listing_data['ign']}** is also listed elsewhere ({len(existing) or 1} other listing(s))."
+                await responder.send(content)
+        finally:
+            data_manager.ign_index.release(reserved)
+            admission.leave()
         self.stop()
     
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary, emoji="❌")
@@ -614,57 +2379,73 @@ class ListingManageView(View):
         super().__init__(timeout=None)
         self.listing_data = listing_data
     
+    def current_listing(self, interaction: discord.Interaction) -> Tuple[str, Dict]:
+        """Latest stored state of this listing, falling back to the data the view was created with"""
+        listing_id = data_manager.resolve_listing_id(interaction.message.id)
+        return listing_id, data_manager.listings.get(listing_id, self.listing_data)
+    
     @discord.ui.button(label="Update Price", style=discord.ButtonStyle.primary, emoji="💰")
     async def update_price(self, interaction: discord.Interaction, button: Button):
-        if interaction.user.id != self.listing_data["seller_id"]:
+        listing_id, listing = self.current_listing(interaction)
+        if interaction.user.id != listing["seller_id"]:
             await interaction.response.send_message("Only the seller can update this listing!", ephemeral=True)
             return
         
-        modal = UpdatePriceModal(self.listing_data)
+        modal = UpdatePriceModal(listing_id, listing)
         await interaction.response.send_modal(modal)
     
     @discord.ui.button(label="Get BIN", style=discord.ButtonStyle.success, emoji="💳")
     async def get_bin(self, interaction: discord.Interaction, button: Button):
-        if interaction.user.id == self.listing_data["seller_id"]:
+        listing_id, listing = self.current_listing(interaction)
+        if interaction.user.id == listing["seller_id"]:
             await interaction.response.send_message("You can't buy your own listing!", ephemeral=True)
             return
         
-        if not self.listing_data.get("bin_price"):
+        if not listing.get("bin_price"):
             await interaction.response.send_message("No BIN price is set for this listing!", ephemeral=True)
             return
         
-        view = BINConfirmView(self.listing_data, interaction.user)
+        view = BINConfirmView(listing, interaction.user)
         embed = discord.Embed(
             title="Confirm Purchase",
-            description=f"Are you sure you want to buy **{self.listing_data['ign']}** for **{self.listing_data['bin_price']}**?",
+            description=f"Are you sure you want to buy **{listing['ign']}** for **{listing['bin_price']}**?",
             color=0x00FF00
         )
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
     
     @discord.ui.button(label="Make Offer", style=discord.ButtonStyle.primary, emoji="📈")
     async def make_offer(self, interaction: discord.Interaction, button: Button):
-        if interaction.user.id == self.listing_data["seller_id"]:
+        listing_id, listing = self.current_listing(interaction)
+        if interaction.user.id == listing["seller_id"]:
             await interaction.response.send_message("You can't make an offer on your own listing!", ephemeral=True)
             return
         
-        modal = MakeOfferModal(self.listing_data, interaction.user)
+        modal = MakeOfferModal(listing, interaction.user)
         await interaction.response.send_modal(modal)
     
     @discord.ui.button(label="Mark as Sold", style=discord.ButtonStyle.success, emoji="✅")
     async def mark_sold(self, interaction: discord.Interaction, button: Button):
-        if interaction.user.id != self.listing_data["seller_id"]:
+        listing_id, listing = self.current_listing(interaction)
+        if interaction.user.id != listing["seller_id"]:
             await interaction.response.send_message("Only the seller can mark this as sold!", ephemeral=True)
             return
         
-        embed = interaction.message.embeds[0]
-        embed.color = 0x00FF00
-        embed.title = f"[SOLD] {embed.title}"
-        
-        await interaction.response.edit_message(embed=embed, view=None)
-        
-        if str(interaction.message.id) in data_manager.listings:
-            del data_manager.listings[str(interaction.message.id)]
-            data_manager.save_listings()
+        # Acknowledged up front; the lock then covers the save and the message edits, so
+        # a slower Update Price can't repaint the listing after it is marked sold
+        async with InteractionResponder(interaction, "mark_sold", slow=True, update=True) as responder:
+            async with data_manager.locks.hold(listing_id):
+                listing = data_manager.remove_listing(listing_id)
+                
+                embed = interaction.message.embeds[0]
+                embed.color = 0x00FF00
+                embed.title = f"[SOLD] {embed.title}"
+                
+                if listing is not None:
+                    # Archive first so a crash between the two writes can't lose the sale
+                    archive.append(listing_id, listing, "sold")
+                    data_manager.save_listings()
+                    fanout.edit(interaction.client, listing, interaction.message.id, embed=embed, view=None)
+                await responder.edit(embed=embed, view=None)
 
 class BINConfirmView(View):
     def __init__(self, listing_data: Dict, buyer: discord.User):
@@ -674,24 +2455,31 @@ class BINConfirmView(View):
     
     @discord.ui.button(label="Confirm Purchase", style=discord.ButtonStyle.success, emoji="✅")
     async def confirm_purchase(self, interaction: discord.Interaction, button: Button):
-        seller = interaction.guild.get_member(self.listing_data["seller_id"])
-        if seller:
-            try:
-                embed = discord.Embed(
-                    title="Account Sold!",
-                    description=f"**{self.buyer.display_name}** has purchased **{self.listing_data['ign']}** for **{self.listing_data['bin_price']}**!",
-                    color=0x00FF00
-                )
-                embed.add_field(name="Buyer", value=f"{self.buyer.mention}", inline=True)
-                embed.add_field(name="Account", value=f"{self.listing_data['ign']}", inline=True)
-                embed.add_field(name="Price", value=f"{self.listing_data['bin_price']}", inline=True)
-                embed.add_field(name="Next Steps", value="Please coordinate the account transfer privately.", inline=False)
-                
-                await seller.send(embed=embed)
-            except:
-                pass
+        if await reject_if_limited(interaction, "bin") or await reject_if_busy(interaction):
+            return
         
-        await interaction.response.send_message(f"✅ Purchase confirmed! The seller has been notified. Please contact {seller.mention if seller else 'the seller'} to arrange the transfer.", ephemeral=True)
+        try:
+            async with InteractionResponder(interaction, "bin") as responder:
+                seller = await seller_cache.get(interaction, self.listing_data["seller_id"])
+                if seller:
+                    try:
+                        embed = discord.Embed(
+                            title="Account Sold!",
+                            description=f"**{self.buyer.display_name}** has purchased **{self.listing_data['ign']}** for **{self.listing_data['bin_price']}**!",
+                            color=0x00FF00
+                        )
+                        embed.add_field(name="Buyer", value=f"{self.buyer.mention}", inline=True)
+                        embed.add_field(name="Account", value=f"{self.listing_data['ign']}", inline=True)
+                        embed.add_field(name="Price", value=f"{self.listing_data['bin_price']}", inline=True)
+                        embed.add_field(name="Next Steps", value="Please coordinate the account transfer privately.", inline=False)
+                        
+                        await seller.send(embed=embed)
+                    except:
+                        pass
+                
+                await responder.send(f"✅ Purchase confirmed! The seller has been notified. Please contact {seller.mention if seller else 'the seller'} to arrange the transfer.")
+        finally:
+            admission.leave()
         self.stop()
     
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary, emoji="❌")
@@ -725,24 +2513,31 @@ class OfferConfirmView(View):
     
     @discord.ui.button(label="Send Offer", style=discord.ButtonStyle.success, emoji="📤")
     async def send_offer(self, interaction: discord.Interaction, button: Button):
-        seller = interaction.guild.get_member(self.listing_data["seller_id"])
-        if seller:
-            try:
-                embed = discord.Embed(
-                    title="New Offer Received!",
-                    description=f"**{self.buyer.display_name}** has made an offer on **{self.listing_data['ign']}**!",
-                    color=0x5865F2
-                )
-                embed.add_field(name="Offer Amount", value=f"{self.offer_amount}", inline=True)
-                embed.add_field(name="Current BIN", value=f"{self.listing_data.get('bin_price', 'Not Set')}", inline=True)
-                embed.add_field(name="Buyer", value=f"{self.buyer.mention}", inline=True)
-                embed.add_field(name="Accept Offer?", value="You can accept this offer or wait for a higher one. Contact the buyer directly to negotiate.", inline=False)
-                
-                await seller.send(embed=embed)
-            except:
-                pass
+        if await reject_if_limited(interaction, "offer") or await reject_if_busy(interaction):
+            return
         
-        await interaction.response.send_message(f"✅ Offer sent! The seller has been notified of your **{self.offer_amount}** offer.", ephemeral=True)
+        try:
+            async with InteractionResponder(interaction, "offer") as responder:
+                seller = await seller_cache.get(interaction, self.listing_data["seller_id"])
+                if seller:
+                    try:
+                        embed = discord.Embed(
+                            title="New Offer Received!",
+                            description=f"**{self.buyer.display_name}** has made an offer on **{self.listing_data['ign']}**!",
+                            color=0x5865F2
+                        )
+                        embed.add_field(name="Offer Amount", value=f"{self.offer_amount}", inline=True)
+                        embed.add_field(name="Current BIN", value=f"{self.listing_data.get('bin_price', 'Not Set')}", inline=True)
+                        embed.add_field(name="Buyer", value=f"{self.buyer.mention}", inline=True)
+                        embed.add_field(name="Accept Offer?", value="You can accept this offer or wait for a higher one. Contact the buyer directly to negotiate.", inline=False)
+                        
+                        await seller.send(embed=embed)
+                    except:
+                        pass
+                
+                await responder.send(f"✅ Offer sent! The seller has been notified of your **{self.offer_amount}** offer.")
+        finally:
+            admission.leave()
         self.stop()
     
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary, emoji="❌")
@@ -754,37 +2549,58 @@ class UpdatePriceModal(Modal, title="Update Listing Prices"):
     bin_price = TextInput(label="New BIN Price", placeholder="e.g., $60 or 60 USD", required=False)
     co = TextInput(label="New Current Offer", placeholder="e.g., $45 or 45 USD", required=False)
     
-    def __init__(self, listing_data: Dict):
+    def __init__(self, listing_id: str, listing_data: Dict):
         super().__init__()
-        self.listing_data = listing_data
+        self.listing_id = listing_id
+        # Version the seller saw when opening the form; a newer stored version wins
+        self.version = listing_data.get("version", 0)
     
     async def on_submit(self, interaction: discord.Interaction):
+        changes = {}
         if self.bin_price.value:
-            self.listing_data["bin_price"] = self.bin_price.value
+            changes["bin_price"] = self.bin_price.value
         if self.co.value:
-            self.listing_data["co"] = self.co.value
-        
-        message_id = str(interaction.message.id)
-        if message_id in data_manager.listings:
-            data_manager.listings[message_id].update(self.listing_data)
-            data_manager.save_listings()
-        
-        guild_settings = data_manager.get_guild_settings(interaction.guild_id)
-        stats = self.listing_data.get("stats", {})
-        custom_colors = self.listing_data.get("custom_colors", {})
-        
-        embed = EmbedBuilder.create_listing_embed(
-            self.listing_data["ign"],
-            interaction.user,
-            stats,
-            self.listing_data.get("bin_price"),
-            self.listing_data.get("co"),
-            self.listing_data.get("notes"),
-            guild_settings,
-            custom_colors
-        )
+            changes["co"] = self.co.value
         
-        await interaction.response.edit_message(embed=embed)
+        # The full-file save below is slow on large stores; acknowledge before doing it
+        async with InteractionResponder(interaction, "update_price", slow=True, update=True) as responder:
+            # The version check rejects forms opened before a newer update; the lock, held
+            # through the save and the message edits, keeps accepted updates painting in order
+            async with data_manager.locks.hold(self.listing_id):
+                previous = data_manager.listings.get(self.listing_id)
+                try:
+                    listing = data_manager.update_listing(self.listing_id, changes, self.version)
+                except StaleListingError:
+                    await responder.send(
+                        "⚠️ This listing was updated after you opened this form. Please press **Update Price** again."
+                    )
+                    return
+                
+                if listing is None:
+                    await responder.send("This listing is no longer active.")
+                    return
+                
+                if changes:
+                    data_manager.save_listings()
+                    price_history.record(listing["ign"], listing.get("bin_price"), listing.get("co"))
+                    if "bin_price" in changes:
+                        watchlists.notify(self.listing_id, listing, previous_bin=previous.get("bin_price") or "")
+                
+                guild_settings = data_manager.get_guild_settings(interaction.guild_id)
+                
+                embed = EmbedBuilder.create_listing_embed(
+                    listing["ign"],
+                    interaction.user,
+                    listing.get("stats", {}),
+                    listing.get("bin_price"),
+                    listing.get("co"),
+                    listing.get("notes"),
+                    guild_settings,
+                    listing.get("custom_colors", {})
+                )
+                
+                await responder.edit(embed=embed)
+                fanout.edit(interaction.client, listing, interaction.message.id, embed=embed)
 
 class SettingsView(View):
     def __init__(self, guild_id: int):
@@ -798,30 +2614,36 @@ class SettingsView(View):
     
     @discord.ui.button(label="Toggle Minimal Emojis", style=discord.ButtonStyle.secondary, emoji="😊")
     async def toggle_emojis(self, interaction: discord.Interaction, button: Button):
-        settings = data_manager.get_guild_settings(self.guild_id)
-        settings["minimal_emojis"] = not settings.get("minimal_emojis", False)
-        data_manager.update_guild_settings(self.guild_id, settings)
+        enabled = not data_manager.get_guild_settings(self.guild_id).get("minimal_emojis", False)
+        data_manager.update_guild_settings(self.guild_id, {"minimal_emojis": enabled})
         
-        status = "enabled" if settings["minimal_emojis"] else "disabled"
+        status = "enabled" if enabled else "disabled"
         await interaction.response.send_message(f"Minimal emojis {status}!", ephemeral=True)
     
     @discord.ui.button(label="Toggle Thumbnails", style=discord.ButtonStyle.secondary, emoji="🖼️")
     async def toggle_thumbnails(self, interaction: discord.Interaction, button: Button):
-        settings = data_manager.get_guild_settings(self.guild_id)
-        settings["show_thumbnails"] = not settings.get("show_thumbnails", True)
-        data_manager.update_guild_settings(self.guild_id, settings)
+        enabled = not data_manager.get_guild_settings(self.guild_id).get("show_thumbnails", True)
+        data_manager.update_guild_settings(self.guild_id, {"show_thumbnails": enabled})
         
-        status = "enabled" if settings["show_thumbnails"] else "disabled"
+        status = "enabled" if enabled else "disabled"
         await interaction.response.send_message(f"Thumbnails {status}!", ephemeral=True)
     
     @discord.ui.button(label="Toggle Detailed Stats", style=discord.ButtonStyle.secondary, emoji="📊")
     async def toggle_detailed(self, interaction: discord.Interaction, button: Button):
-        settings = data_manager.get_guild_settings(self.guild_id)
-        settings["show_detailed_stats"] = not settings.get("show_detailed_stats", True)
-        data_manager.update_guild_settings(self.guild_id, settings)
+        enabled = not data_manager.get_guild_settings(self.guild_id).get("show_detailed_stats", True)
+        data_manager.update_guild_settings(self.guild_id, {"show_detailed_stats": enabled})
         
-        status = "enabled" if settings["show_detailed_stats"] else "disabled"
+        status = "enabled" if enabled else "disabled"
         await interaction.response.send_message(f"Detailed stats {status}!", ephemeral=True)
+    
+    @discord.ui.button(label="Duplicate Policy", style=discord.ButtonStyle.secondary, emoji="👥")
+    async def cycle_duplicate_policy(self, interaction: discord.Interaction, button: Button):
+        current = data_manager.get_guild_settings(self.guild_id).get("duplicate_policy", "warn")
+        index = DUPLICATE_POLICIES.index(current) if current in DUPLICATE_POLICIES else 0
+        policy = DUPLICATE_POLICIES[(index + 1) % len(DUPLICATE_POLICIES)]
+        data_manager.update_guild_settings(self.guild_id, {"duplicate_policy": policy})
+        
+        await interaction.response.send_message(f"Duplicate listings policy set to **{policy}**!", ephemeral=True)
 
 class ColorModal(Modal, title="Change Embed Color"):
     color = TextInput(
@@ -845,26 +2667,406 @@ class ColorModal(Modal, title="Change Embed Color"):
         except ValueError:
             await interaction.response.send_message("❌ Invalid hex color! Use format: #FF5733", ephemeral=True)
 
+# =================== BULK LISTINGS ===================
+def iter_bulk_rows(data: bytes, filename: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, raw row) from a CSV, JSON array or JSON Lines upload.
+    
+    CSV and JSON Lines are parsed lazily, one row at a time; a JSON array is
+    decoded whole (uploads are capped at BULK_MAX_BYTES). JSON Lines rows are
+    yielded undecoded so a bad line only fails that row.
+    """
+    text = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline="")
+    if filename.lower().endswith(".csv"):
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    
+    first, blank_lines = text.read(1), 0
+    while first.isspace():
+        blank_lines += first == "\n"
+        first = text.read(1)
+    if first == "[":
+        rows = json.loads(first + text.read())
+        for number, row in enumerate(rows, start=1):
+            yield number, row
+        return
+    
+    for number, line in enumerate(itertools.chain([first + text.readline()], text), start=blank_lines + 1):
+        if line.strip():
+            yield number, line
+
+def flatten_bulk_row(raw: Any) -> Dict[str, Any]:
+    """Accept flat rows (bedwars_level, embed_color, ...) or nested stats/custom_colors objects"""
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    if not isinstance(raw, dict):
+        raise ValueError("expected an object")
+    
+    row = {str(key).strip().lower(): value for key, value in raw.items() if key is not None}
+    stats = row.pop("stats", None) or {}
+    if not isinstance(stats, dict):
+        raise ValueError("stats must be an object")
+    for game, values in stats.items():
+        if not isinstance(values or {}, dict):
+            raise ValueError(f"stats.{game} must be an object")
+        for name, value in (values or {}).items():
+            row.setdefault(name if game == "general" else f"{game}_{name}", value)
+    colors = row.pop("custom_colors", None) or {}
+    if not isinstance(colors, dict):
+        raise ValueError("custom_colors must be an object")
+    for name, value in colors.items():
+        row.setdefault(name, value)
+    return row
+
+def parse_bulk_row(raw: Any, seller_id: int) -> Dict:
+    """Validate one upload row into the listing data shape StatSelectionView produces"""
+    row = flatten_bulk_row(raw)
+    
+    def field(name: str, cast, default):
+        value = row.get(name)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return default
+        try:
+            result = cast(value.strip() if isinstance(value, str) else value)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid {name}: {value!r}")
+        if isinstance(result, (int, float)) and result < 0:
+            raise ValueError(f"{name} cannot be negative")
+        return result
+    
+    def color(value) -> int:
+        return value if isinstance(value, int) else int(str(value).lstrip('#'), 16)
+    
+    ign = str(row.get("ign") or "").strip()
+    if not ign or len(ign) > 16:
+        raise ValueError("ign is required (at most 16 characters)")
+    
+    def text(name: str) -> Optional[str]:
+        value = row.get(name)
+        return str(value).strip() or None if value is not None else None
+    
+    listing_data = blank_listing_data(seller_id, ign, text("bin_price"), text("co"), text("notes"))
+    if listing_data["notes"] and len(listing_data["notes"]) > 1000:
+        raise ValueError("notes are limited to 1000 characters")
+    
+    # Optional Minecraft UUID: lets duplicate detection follow an account across renames
+    uuid = text("uuid")
+    if uuid is not None:
+        if not re.fullmatch(r"[0-9a-f]{32}", uuid.replace("-", "").lower()):
+            raise ValueError(f"invalid uuid: {uuid!r}")
+        listing_data["uuid"] = uuid.replace("-", "").lower()
+    
+    title = field("duels_title", str, None)
+    if title is not None:
+        title = next((t[0] for t in DUELS_TITLES if t[0].lower() == title.lower()), None)
+        if title is None:
+            raise ValueError(f"unknown duels_title {row['duels_title']!r}")
+    
+    stats = listing_data["stats"]
+    stats["general"] = {"rank": field("rank", str, "None"), "network_level": field("network_level", int, 1)}
+    stats["bedwars"] = {
+        "level": field("bedwars_level", int, 0),
+        "fkdr": field("bedwars_fkdr", float, 0.0),
+        "wins": field("bedwars_wins", int, 0)
+    }
+    stats["skywars"] = {
+        "level": field("skywars_level", int, 0),
+        "kdr": field("skywars_kdr", float, 0.0),
+        "wins": field("skywars_wins", int, 0)
+    }
+    stats["duels"] = {"title": title, "wins": field("duels_wins", int, 0), "kdr": field("duels_kdr", float, 0.0)}
+    
+    for name in ("embed_color", "bedwars_color", "skywars_color", "duels_color"):
+        value = field(name, color, listing_data["custom_colors"][name])
+        if value is not None and value > 0xFFFFFF:
+            raise ValueError(f"invalid {name}: {row[name]!r}")
+        listing_data["custom_colors"][name] = value
+    return listing_data
+
+class BulkListingJob:
+    """Validate, post and commit the rows of one /bulklist upload.
+    
+    Posts are paced by the seller's "bulk" quota and the channel send budget.
+    Every sent message is journaled before the next row is posted, and the
+    journal is replayed into the store at start-up if the process died before
+    the batch commit. When the quota would keep the job waiting too long, or
+    BULK_MAX_POSTS rows have been posted, the remaining rows are reported as
+    pending; running /bulklist again with the same file resumes,
+    because rows the seller already has listed in this server are skipped.
+    """
+    def __init__(self, interaction: discord.Interaction, channel, guild_settings: Dict):
+        self.interaction = interaction
+        self.channel = channel
+        self.guild_settings = guild_settings
+        self.results: List[Tuple[int, str, str, str]] = []
+        self.posted: Dict[str, Tuple[Dict, discord.Embed]] = {}
+        self.reserved: List[str] = []
+        self.seen: set = set()
+        self.paused: Optional[str] = None
+        self.journal_path = os.path.join(BULK_JOURNAL_DIR, f"{interaction.id}.jsonl")
+    
+    def already_listed(self, listing_data: Dict) -> Tuple[bool, set]:
+        """(listed by this seller here already, other listings of the account)"""
+        existing, in_flight = data_manager.ign_index.lookup(listing_data)
+        mine = any(
+            data_manager.listings.get(listing_id, {}).get("seller_id") == self.interaction.user.id
+            and data_manager.listings.get(listing_id, {}).get("guild_id") == self.interaction.guild_id
+            for listing_id in existing
+        )
+        others = set(existing)
+        if in_flight:
+            others.add("in flight")
+        return mine, others
+    
+    async def acquire_quota(self) -> bool:
+        user_id, guild_id = self.interaction.user.id, self.interaction.guild_id
+        wait = admission.check("bulk", user_id, guild_id)
+        while wait and wait <= BULK_MAX_WAIT_SECONDS:
+            await asyncio.sleep(wait)
+            wait = admission.check("bulk", user_id, guild_id)
+        return not wait
+    
+    async def run(self, rows: Iterator[Tuple[int, Any]]):
+        for line, raw in rows:
+            try:
+                listing_data = parse_bulk_row(raw, self.interaction.user.id)
+            except Exception as e:
+                # Rows are untrusted input: a malformed one fails alone, never the whole job
+                self.results.append((line, "", "invalid", str(e) if isinstance(e, ValueError) else f"malformed row ({e!r})"))
+                continue
+            ign = listing_data["ign"]
+            
+            keys = ListingIndex.keys_for(listing_data)
+            if self.seen.intersection(keys):
+                self.results.append((line, ign, "skipped", "duplicate row in this file"))
+                continue
+            self.seen.update(keys)
+            
+            mine, others = self.already_listed(listing_data)
+            if mine:
+                self.results.append((line, ign, "skipped", "already listed by you"))
+                continue
+            if others and self.guild_settings.get("duplicate_policy", "warn") == "block":
+                self.results.append((line, ign, "blocked", "already listed and this server blocks duplicates"))
+                continue
+            
+            if not self.paused and len(self.posted) >= BULK_MAX_POSTS:
+                self.paused = f"{BULK_MAX_POSTS} posts per run"
+            elif not self.paused and not await self.acquire_quota():
+                self.paused = "rate limited"
+            if self.paused:
+                self.results.append((line, ign, "pending", f"{self.paused}; run /bulklist again with this file to resume"))
+                continue
+            
+            self.reserved += data_manager.ign_index.reserve(listing_data)
+            embed = EmbedBuilder.create_listing_embed(
+                ign, self.interaction.user, listing_data["stats"], listing_data["bin_price"],
+                listing_data["co"], listing_data["notes"], self.guild_settings, listing_data["custom_colors"]
+            )
+            await fanout.throttle(self.channel.id)
+            try:
+                message = await self.channel.send(embed=embed, view=ListingManageView(listing_data))
+            except discord.HTTPException as e:
+                self.results.append((line, ign, "failed", f"Discord rejected the post ({e.status})"))
+                continue
+            
+            listing = {
+                **listing_data,
+                "message_id": message.id,
+                "channel_id": self.channel.id,
+                "guild_id": self.interaction.guild_id,
+                "created_at": datetime.utcnow().isoformat()
+            }
+            self.posted[str(message.id)] = (listing, embed)
+            self.journal(str(message.id), listing)
+            detail = f"also listed elsewhere ({len(others)} other listing(s))" if others else ""
+            self.results.append((line, ign, "posted", detail))
+    
+    def commit(self):
+        """Write every posted row to the store in one batch, then run the per-listing side effects"""
+        data_manager.ign_index.release(self.reserved)
+        self.reserved = []
+        if not self.posted:
+            return
+        data_manager.add_listings({listing_id: listing for listing_id, (listing, _) in self.posted.items()})
+        data_manager.save_listings()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.journal_path)
+        for listing_id, (listing, embed) in self.posted.items():
+            fanout.post(self.interaction.client, listing_id, listing, embed, exclude=self.channel.id)
+            price_history.record(listing["ign"], listing.get("bin_price"), listing.get("co"))
+            watchlists.notify(listing_id, listing)
+    
+    def journal(self, listing_id: str, listing: Dict):
+        os.makedirs(BULK_JOURNAL_DIR, exist_ok=True)
+        with open(self.journal_path, 'a') as f:
+            f.write(json.dumps({"listing_id": listing_id, "listing": listing}) + "\n")
+    
+    @staticmethod
+    def recover_journals() -> int:
+        """Store listings a job posted but never committed; returns how many were recovered"""
+        if not os.path.isdir(BULK_JOURNAL_DIR):
+            return 0
+        recovered = {}
+        paths = [os.path.join(BULK_JOURNAL_DIR, name) for name in os.listdir(BULK_JOURNAL_DIR) if name.endswith(".jsonl")]
+        for path in paths:
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn last line
+                    if entry["listing_id"] not in data_manager.listings:
+                        recovered[entry["listing_id"]] = entry["listing"]
+        if recovered:
+            # Mirrors are not re-sent; the client is not connected yet
+            data_manager.add_listings(recovered)
+            data_manager.save_listings()
+            for listing_id, listing in recovered.items():
+                price_history.record(listing["ign"], listing.get("bin_price"), listing.get("co"))
+                watchlists.notify(listing_id, listing)
+        for path in paths:
+            os.remove(path)
+        return len(recovered)
+    
+    def summary_embed(self) -> discord.Embed:
+        counts: Dict[str, int] = {}
+        for _, _, status, _ in self.results:
+            counts[status] = counts.get(status, 0) + 1
+        embed = discord.Embed(
+            title="Bulk Listing Report",
+            color=0xFFAA00 if counts.get("pending") or counts.get("failed") or counts.get("invalid") else 0x00FF00,
+            description=" · ".join(f"**{count}** {status}" for status, count in counts.items()) or "No rows found."
+        )
+        problems = [result for result in self.results if result[2] not in ("posted", "skipped")]
+        if problems:
+            embed.add_field(
+                name="Needs attention",
+                value="\n".join(f"Row {line}: {ign or '—'} — {status}: {detail}" for line, ign, status, detail in problems[:10])[:1024],
+                inline=False
+            )
+        embed.set_footer(text="Full per-row results are attached")
+        return embed
+    
+    def report_file(self) -> discord.File:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["row", "ign", "status", "detail"])
+        writer.writerows(self.results)
+        return discord.File(io.BytesIO(buffer.getvalue().encode("utf-8")), filename="bulklist_report.csv")
+
 # =================== DISCORD BOT ===================
 class AdvancedListingBot(commands.Bot):
-    def __init__(self):
-        intents = discord.Intents.default()
-        intents.message_content = True
-        super().__init__(command_prefix='!', intents=intents)
+    def __init__(self, lean: bool = False):
+        if lean:
+            # Everything the bot does arrives as an interaction; only the channel cache is needed
+            intents = discord.Intents.none()
+            intents.guilds = True
+            options = {
+                "max_messages": None,
+                "chunk_guilds_at_startup": False,
+                "member_cache_flags": discord.MemberCacheFlags.none()
+            }
+        else:
+            intents = discord.Intents.default()
+            intents.message_content = True
+            options = {}
+        super().__init__(command_prefix='!', intents=intents, **options)
     
     async def setup_hook(self):
+        recovered = BulkListingJob.recover_journals()
+        if recovered:
+            print(f"Recovered {recovered} listings from interrupted /bulklist jobs")
+        self.flush_drafts.start()
+        self.watch_config.start()
+        self.write_snapshot.start()
+        self.send_watch_alerts.start()
+        self.index_warmer = asyncio.create_task(data_manager.warm_indexes())
         await self.tree.sync()
         print(f"Synced {len(self.tree.get_commands())} commands")
+    
+    async def close(self):
+        draft_store.flush()
+        watchlists.flush()
+        price_history.flush()
+        data_manager.save_snapshot()
+        await super().close()
+    
+    @tasks.loop(seconds=30)
+    async def flush_drafts(self):
+        draft_store.evict()
+        draft_store.flush()
+        watchlists.flush()
+        price_history.flush()
+    
+    @tasks.loop(seconds=WATCH_ALERT_INTERVAL_SECONDS)
+    async def send_watch_alerts(self):
+        await watchlists.flush_alerts(self)
+    
+    @tasks.loop(seconds=SNAPSHOT_INTERVAL_SECONDS)
+    async def write_snapshot(self):
+        data_manager.save_snapshot()
+    
+    @tasks.loop(seconds=CONFIG_POLL_SECONDS)
+    async def watch_config(self):
+        if data_manager.reload_if_changed():
+            print("🔄 Settings reloaded")
 
-bot = AdvancedListingBot()
+bot = AdvancedListingBot(lean=LEAN_MODE)
 
 # =================== SLASH COMMANDS ===================
 @bot.tree.command(name="list", description="Create a new account listing with custom stats")
 async def create_listing(interaction: discord.Interaction):
     """Create a new account listing with manual stat customization"""
+    if await reject_if_limited(interaction, "list"):
+        return
+    
+    draft_key = draft_store.key_for(interaction.user.id, interaction.guild_id)
+    draft = draft_store.get(draft_key)
+    if draft is not None:
+        embed = StatSelectionView.instructions_embed(draft["ign"], resumed=True)
+        await interaction.response.send_message(embed=embed, view=StatSelectionView(draft_key), ephemeral=True)
+        return
+    
     modal = ListingModal(bot)
     await interaction.response.send_modal(modal)
 
+@bot.tree.command(name="bulklist", description="Post several listings from a CSV or JSON file")
+@app_commands.describe(file="CSV with a header row, a JSON array, or JSON Lines; one account per row")
+async def bulk_list(interaction: discord.Interaction, file: discord.Attachment):
+    """Post listings for every valid row of an uploaded file and report per-row results"""
+    if file.size > BULK_MAX_BYTES:
+        await interaction.response.send_message(f"That file is too large (limit {BULK_MAX_BYTES // 1024} KB).", ephemeral=True)
+        return
+    
+    guild_settings = data_manager.get_guild_settings(interaction.guild_id)
+    channel_id = guild_settings.get("listing_channel") or guild_settings.get("default_channel_id") or interaction.channel_id
+    channel = interaction.client.get_channel(int(channel_id))
+    if not channel:
+        await interaction.response.send_message("Channel not found!", ephemeral=True)
+        return
+    
+    if await reject_if_busy(interaction):
+        return
+    
+    try:
+        async with InteractionResponder(interaction, "bulklist", slow=True) as responder:
+            job = BulkListingJob(interaction, channel, guild_settings)
+            try:
+                await job.run(iter_bulk_rows(await file.read(), file.filename))
+            except (ValueError, UnicodeDecodeError, csv.Error) as e:
+                job.results.append((0, "", "invalid", f"could not read file: {e}"))
+            except Exception as e:
+                print(f"Bulk listing job stopped: {e!r}")
+                job.results.append((0, "", "failed", "the job stopped unexpectedly; run /bulklist again to resume"))
+            finally:
+                # Rows already sent are committed even if the job is interrupted
+                job.commit()
+            await responder.send(embed=job.summary_embed(), file=job.report_file())
+    finally:
+        admission.leave()
+
 @bot.tree.command(name="settings", description="Configure bot settings for this server")
 @app_commands.default_permissions(manage_guild=True)
 async def server_settings(interaction: discord.Interaction):
@@ -887,7 +3089,8 @@ async def server_settings(interaction: discord.Interaction):
               f"**Minimal Emojis:** {'Yes' if settings.get('minimal_emojis') else 'No'}\n"
               f"**Show Thumbnails:** {'Yes' if settings.get('show_thumbnails', True) else 'No'}\n"
               f"**Detailed Stats:** {'Yes' if settings.get('show_detailed_stats', True) else 'No'}\n"
-              f"**Show Separators:** {'Yes' if settings.get('show_separators', True) else 'No'}",
+              f"**Show Separators:** {'Yes' if settings.get('show_separators', True) else 'No'}\n"
+              f"**Duplicate Listings:** {settings.get('duplicate_policy', 'warn').title()}",
         inline=False
     )
     
@@ -931,6 +3134,200 @@ async def my_listings(interaction: discord.Interaction):
     
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
+async def ign_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    """Suggest IGNs of active listings that start with what the user has typed"""
+    igns = []
+    for listing_id in data_manager.search_index.suggest_ids(current, 50):
+        ign = data_manager.listings.get(listing_id, {}).get("ign")
+        if ign and ign not in igns:
+            igns.append(ign)
+    return [app_commands.Choice(name=ign, value=ign) for ign in igns[:25]]
+
+async def listing_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    """Suggest active listings matching an IGN prefix or words from their notes"""
+    choices = []
+    for listing_id in data_manager.search_index.search(current, 25):
+        listing = data_manager.listings.get(listing_id)
+        if listing:
+            name = f"{listing.get('ign', 'Unknown')} — BIN {listing.get('bin_price') or 'Not Set'}"
+            choices.append(app_commands.Choice(name=name[:100], value=listing.get("ign", "")[:100]))
+    return choices
+
+@bot.tree.command(name="search", description="Search active listings by IGN or notes")
+@app_commands.describe(query="IGN prefix or words from the listing notes")
+@app_commands.autocomplete(query=listing_autocomplete)
+async def search_listings(interaction: discord.Interaction, query: str):
+    """Search active listings"""
+    results = [
+        (listing_id, data_manager.listings[listing_id])
+        for listing_id in data_manager.search_index.search(query, 10)
+        if listing_id in data_manager.listings
+    ]
+    
+    if not results:
+        await interaction.response.send_message(f"No active listings match **{query}**.", ephemeral=True)
+        return
+    
+    embed = discord.Embed(
+        title="Search Results",
+        color=0x5865F2,
+        description=f"{len(results)} listing(s) matching **{query}**"
+    )
+    
+    for listing_id, listing in results:
+        value = f"**BIN:** {listing.get('bin_price') or 'Not Set'}\n"
+        if listing.get("co"):
+            value += f"**C/O:** {listing['co']}\n"
+        value += f"[Jump to listing](https://discord.com/channels/{listing.get('guild_id')}/{listing.get('channel_id')}/{listing_id})"
+        embed.add_field(name=listing.get("ign", "Unknown"), value=value, inline=True)
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="pricehistory", description="Show the price history of an account")
+@app_commands.describe(ign="Minecraft username of the account")
+@app_commands.autocomplete(ign=ign_autocomplete)
+async def price_history_command(interaction: discord.Interaction, ign: str):
+    """Show hourly and daily price rollups for an account"""
+    daily = price_history.query(ign, "daily", 14)
+    hourly = price_history.query(ign, "hourly", 12)
+    
+    if not daily:
+        await interaction.response.send_message(f"No price history recorded for **{ign}**.", ephemeral=True)
+        return
+    
+    def format_bucket(start: int, bucket: List[Optional[float]], fmt: str) -> str:
+        label = datetime.utcfromtimestamp(start).strftime(fmt)
+        parts = []
+        for name, base in (("BIN", 0), ("C/O", 3)):
+            low, high, last = bucket[base:base + 3]
+            if last is not None:
+                parts.append(f"{name} `{last:g}` ({low:g}–{high:g})")
+        return f"**{label}** " + " · ".join(parts)
+    
+    embed = discord.Embed(title=f"{ign} — Price History", color=0x5865F2)
+    embed.add_field(
+        name="Daily (UTC)",
+        value="\n".join(format_bucket(start, bucket, "%b %d") for start, bucket in daily),
+        inline=False
+    )
+    if hourly:
+        embed.add_field(
+            name="Recent Hours (UTC)",
+            value="\n".join(format_bucket(start, bucket, "%b %d %H:00") for start, bucket in hourly),
+            inline=False
+        )
+    embed.set_footer(text="Last price (min–max) per period")
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="salehistory", description="Show a seller's past sales")
+@app_commands.describe(seller="Seller to look up (defaults to you)")
+async def sale_history(interaction: discord.Interaction, seller: Optional[discord.User] = None):
+    """Show recent archived sales for a seller"""
+    seller = seller or interaction.user
+    sales = archive.seller_sales(seller.id)
+    
+    if not sales:
+        await interaction.response.send_message(f"No recorded sales for {seller.mention}.", ephemeral=True)
+        return
+    
+    lines = [
+        f"**{sale.get('ign', 'Unknown')}** — BIN {sale.get('bin_price') or 'Not Set'} · <t:{int(sale['closed_at'])}:d>"
+        for sale in sales
+    ]
+    embed = discord.Embed(title=f"Sales by {seller.display_name}", color=0x00FF00, description="\n".join(lines))
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="salestats", description="Show monthly sales for this server")
+async def sale_stats(interaction: discord.Interaction):
+    """Show sold and expired listing counts per month for this server"""
+    rows = archive.guild_monthly(interaction.guild_id)
+    
+    if not rows:
+        await interaction.response.send_message("No archived listings for this server yet.", ephemeral=True)
+        return
+    
+    embed = discord.Embed(
+        title="Monthly Sales",
+        color=0x5865F2,
+        description="\n".join(
+            f"**{month}** — {sold} sold (BIN total {volume:g}) · {expired} expired"
+            for month, sold, volume, expired in rows
+        )
+    )
+    embed.set_footer(text="Months in UTC")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="watch", description="Get a DM when a matching account is listed")
+@app_commands.describe(
+    game="Which stat to watch",
+    min_level="Minimum star level (BedWars/SkyWars)",
+    max_level="Maximum star level (BedWars/SkyWars)",
+    duels_title="Minimum Duels title",
+    max_price="Highest BIN price you would pay"
+)
+@app_commands.choices(
+    game=[app_commands.Choice(name=name, value=name.lower()) for name in ("BedWars", "SkyWars", "Duels")],
+    duels_title=[app_commands.Choice(name=title[0], value=title[0]) for title in DUELS_TITLES]
+)
+async def watch(interaction: discord.Interaction, game: str, min_level: Optional[int] = None,
+                max_level: Optional[int] = None, duels_title: Optional[str] = None, max_price: Optional[float] = None):
+    """Subscribe to alerts for new listings matching a level and price range"""
+    if len(watchlists.user_subscriptions(interaction.user.id)) >= WATCH_MAX_PER_USER:
+        await interaction.response.send_message(f"You can have at most {WATCH_MAX_PER_USER} watches. Remove one with `/unwatch`.", ephemeral=True)
+        return
+    
+    if game == "duels":
+        if not duels_title:
+            await interaction.response.send_message("Pick a minimum `duels_title` to watch Duels.", ephemeral=True)
+            return
+        min_level = [t[0] for t in DUELS_TITLES].index(duels_title)
+        max_level = None
+    elif min_level is None:
+        min_level = 0
+    
+    if max_level is not None and max_level < min_level:
+        await interaction.response.send_message("`max_level` must be at least `min_level`.", ephemeral=True)
+        return
+    
+    sub = watchlists.subscribe(interaction.user.id, interaction.guild_id, game, min_level, max_level, max_price)
+    await interaction.response.send_message(f"👀 Watching: {describe_watch(sub)} (ID `{sub['id']}`)", ephemeral=True)
+
+def describe_watch(sub: Dict) -> str:
+    if sub["game"] == "duels":
+        text = f"Duels **{DUELS_TITLES[sub['min_level']][0]}**+"
+    else:
+        name = "BedWars" if sub["game"] == "bedwars" else "SkyWars"
+        upper = f"–{sub['max_level']}" if sub.get("max_level") is not None else "+"
+        text = f"{name} **{sub['min_level']}{upper}★**"
+    if sub.get("max_price") is not None:
+        text += f" under **{sub['max_price']:g}**"
+    return text
+
+@bot.tree.command(name="watchlist", description="Show your watchlist")
+async def show_watchlist(interaction: discord.Interaction):
+    """Show the user's watch subscriptions"""
+    subs = watchlists.user_subscriptions(interaction.user.id)
+    if not subs:
+        await interaction.response.send_message("You aren't watching anything. Use `/watch` to add one.", ephemeral=True)
+        return
+    
+    embed = discord.Embed(
+        title="Your Watchlist",
+        color=0x5865F2,
+        description="\n".join(f"`{sub['id']}` — {describe_watch(sub)}" for sub in subs)
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="unwatch", description="Remove a watch from your watchlist")
+@app_commands.describe(watch_id="ID shown in /watchlist")
+async def unwatch(interaction: discord.Interaction, watch_id: str):
+    """Remove a watch subscription"""
+    if watchlists.unsubscribe(interaction.user.id, watch_id):
+        await interaction.response.send_message("Watch removed.", ephemeral=True)
+    else:
+        await interaction.response.send_message("No watch with that ID on your watchlist.", ephemeral=True)
+
 @bot.tree.command(name="cleanlistings", description="Remove inactive/old listings (Admin)")
 @app_commands.default_permissions(administrator=True)
 async def clean_listings(interaction: discord.Interaction):
@@ -939,30 +3336,73 @@ async def clean_listings(interaction: discord.Interaction):
         await interaction.response.send_message("Admin permissions required.", ephemeral=True)
         return
     
-    removed_count = 0
-    to_remove = []
-    
-    for listing_id, listing in data_manager.listings.items():
-        try:
-            channel = bot.get_channel(listing.get("channel_id"))
-            if not channel:
-                to_remove.append(listing_id)
-                continue
-            
-            message = await channel.fetch_message(listing.get("message_id"))
-            if not message:
+    async with InteractionResponder(interaction, "cleanlistings", slow=True) as responder:
+        removed_count = 0
+        to_remove = []
+        
+        # Iterate a snapshot: listings may be posted or sold while we await fetch_message
+        for listing_id, listing in data_manager.listings_snapshot():
+            try:
+                channel = interaction.client.get_channel(listing.get("channel_id"))
+                if not channel:
+                    to_remove.append(listing_id)
+                    continue
+                
+                message = await channel.fetch_message(listing.get("message_id"))
+                if not message:
+                    to_remove.append(listing_id)
+            except:
                 to_remove.append(listing_id)
-        except:
-            to_remove.append(listing_id)
+        
+        for listing_id in to_remove:
+            listing = data_manager.remove_listing(listing_id)
+            if listing is not None:
+                archive.append(listing_id, listing, "expired")
+                removed_count += 1
+        
+        if removed_count > 0:
+            data_manager.save_listings()
+        
+        await responder.send(f"Cleaned up {removed_count} inactive listings.")
+
+@bot.tree.command(name="duplicates", description="Report accounts listed more than once (Admin)")
+@app_commands.default_permissions(administrator=True)
+async def duplicate_report(interaction: discord.Interaction):
+    """Report duplicate listings that involve this server"""
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("Admin permissions required.", ephemeral=True)
+        return
     
-    for listing_id in to_remove:
-        del data_manager.listings[listing_id]
-        removed_count += 1
+    groups = [
+        group for group in data_manager.ign_index.duplicates()
+        if any(data_manager.listings.get(listing_id, {}).get("guild_id") == interaction.guild_id for listing_id in group)
+    ]
     
-    if removed_count > 0:
-        data_manager.save_listings()
+    if not groups:
+        await interaction.response.send_message("No duplicate listings found.", ephemeral=True)
+        return
     
-    await interaction.response.send_message(f"Cleaned up {removed_count} inactive listings.", ephemeral=True)
+    embed = discord.Embed(
+        title="Duplicate Listings",
+        color=0xFFAA00,
+        description=f"{len(groups)} account(s) are listed more than once"
+    )
+    
+    for group in groups[:25]:
+        lines = []
+        for listing_id in sorted(group):
+            listing = data_manager.listings.get(listing_id)
+            if not listing:
+                continue
+            where = "this server" if listing.get("guild_id") == interaction.guild_id else "another server"
+            lines.append(
+                f"<@{listing.get('seller_id')}> in {where} — "
+                f"https://discord.com/channels/{listing.get('guild_id')}/{listing.get('channel_id')}/{listing_id}"
+            )
+        first = data_manager.listings.get(min(group), {})
+        embed.add_field(name=first.get("ign", "Unknown"), value="\n".join(lines)[:1024] or "—", inline=False)
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="liststats", description="Show bot usage statistics (Admin)")
 @app_commands.default_permissions(administrator=True)
@@ -980,6 +3420,16 @@ async def list_stats(interaction: discord.Interaction):
     embed.add_field(name="This Server", value=str(guild_listings), inline=True)
     embed.add_field(name="Servers", value=str(len(bot.guilds)), inline=True)
     
+    if response_stats.commands:
+        embed.add_field(
+            name="Deferred Responses",
+            value="\n".join(
+                f"`{command}`: {entry['deferred']}/{entry['calls']} deferred, ~{entry['latency'] * 1000:.0f}ms"
+                for command, entry in sorted(response_stats.commands.items())
+            ),
+            inline=False
+        )
+    
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
 # =================== ERROR HANDLING ===================
@@ -1008,8 +3458,9 @@ async def on_ready():
 
 # =================== BOT STARTUP ===================
 if __name__ == "__main__":
+    TOKEN = data_manager.token
     if not TOKEN or "YOUR_BOT_TOKEN" in TOKEN:
-        print("❌ Please set a valid Discord bot token!")
+        print("❌ Please set a valid Discord bot token (DISCORD_TOKEN or \"token\" in the config file)!")
         print("   Get one from: https://discord.com/developers/applications")
     else:
         print("🔥 Starting Advanced Listing Bot...")